@@ -0,0 +1,381 @@
+"""
+Lazy Bones benchmarks.
+
+    python benchmarks/run.py --glyphs 1000 --masters 8 --library 600 --output after.json
+    python benchmarks/run.py --compare before.json after.json
+
+The benchmarks run outside of RoboFont. mojo, ezui and
+vanilla are replaced by the stand-ins in benchmarks/standIn,
+which are backed by fontParts and defcon. glyphConstruction,
+fontParts and defcon must be installed.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import argparse
+import statistics
+import subprocess
+
+basePath = os.path.dirname(os.path.abspath(__file__))
+repositoryPath = os.path.dirname(basePath)
+sys.path.insert(0, os.path.join(basePath, "standIn"))
+sys.path.insert(0, os.path.join(repositoryPath, "source", "code"))
+
+from mojo.roboFont import NewFont, AllFonts, setCurrentFont, closeAllFonts
+from PyObjCTools.AppHelper import runPendingCalls
+import lazyBones
+from lazyBones import constructions as constructionsModule
+from lazyBones.constructions import (
+    loadConstructions,
+    guessConstructionsForGlyphNames,
+    buildGlyphFromConstruction,
+    clearConstructionsCache
+)
+from lazyBones.variables import clearVariablesCache
+from lazyBones.libraryCache import setLibraryCachePath
+from lazyBones.outlineCache import clearOutlineCache
+from lazyBones.graph import ConstructionGraph, getConstructionReferences
+
+
+# ---------------
+# Synthetic Fonts
+# ---------------
+
+def makeLibrary(size):
+    """
+    Make a construction library with at least size
+    constructions by adding alternates of the
+    default constructions.
+    """
+    text = constructionsModule.defaultConstructions
+    names = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        names.append(line.split("=", 1)[0].strip().lstrip("*"))
+    lines = [text]
+    index = 0
+    while len(names) + index < size:
+        name = names[index % len(names)]
+        lines.append(f"*{name}.bench{index} = {name} ^ {name}")
+        index += 1
+    return "\n".join(lines)
+
+def getSourceGlyphNames(library):
+    constructions = {}
+    for line in library.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        name, construction = line.split("=", 1)
+        constructions[name.strip().lstrip("*")] = construction
+    names = set(constructions.keys())
+    for construction in constructions.values():
+        names.update(getConstructionReferences(construction))
+    return sorted(names)
+
+def drawGlyph(glyph, weight, overshoot):
+    pen = glyph.getPen()
+    pen.moveTo((50, overshoot))
+    pen.lineTo((50, 700))
+    pen.lineTo((50 + weight, 700))
+    pen.lineTo((50 + weight, overshoot))
+    pen.closePath()
+    pen.moveTo((100 + weight, overshoot))
+    pen.curveTo((100 + weight, 300), (300, 500), (450, 500))
+    pen.lineTo((450, 450))
+    pen.curveTo((350, 450), (150 + weight, 300), (150 + weight, overshoot))
+    pen.closePath()
+    glyph.width = 500 + weight
+
+def makeFonts(glyphCount, masterCount, library):
+    closeAllFonts()
+    sourceNames = getSourceGlyphNames(library)
+    fillerCount = max(0, glyphCount - len(sourceNames))
+    fillerNames = [f"glyph{index:05d}" for index in range(fillerCount)]
+    fonts = []
+    for masterIndex in range(masterCount):
+        font = NewFont(
+            familyName="Benchmark",
+            styleName=f"Master {masterIndex}",
+            showInterface=False
+        )
+        font.info.unitsPerEm = 1000
+        font.info.descender = -250
+        font.info.xHeight = 500
+        font.info.capHeight = 700
+        font.info.ascender = 750
+        weight = 40 + masterIndex * 10
+        overshoot = -10 - masterIndex
+        for name in sourceNames + fillerNames:
+            glyph = font.newGlyph(name)
+            drawGlyph(glyph, weight, overshoot)
+        fonts.append(font)
+    setCurrentFont(fonts[0])
+    return fonts
+
+
+# ----------
+# Benchmarks
+# ----------
+
+def timeFunction(function, repeat, setup=None):
+    runs = []
+    for i in range(repeat):
+        context = None
+        if setup is not None:
+            context = setup()
+        start = time.perf_counter()
+        function(context)
+        runs.append(time.perf_counter() - start)
+    return dict(
+        min=min(runs),
+        median=statistics.median(runs),
+        mean=statistics.mean(runs),
+        runs=runs
+    )
+
+def timeImport(moduleName, repeat):
+    """
+    Time importing the module in a new interpreter
+    with the cumulative time from -X importtime.
+    """
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(sys.path)
+    runs = []
+    for i in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {moduleName}"],
+            env=environment,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stderr
+        for line in output.splitlines():
+            parts = [part.strip() for part in line.split("|")]
+            if len(parts) == 3 and parts[2] == moduleName:
+                runs.append(int(parts[1]) / 1000000)
+    return dict(
+        min=min(runs),
+        median=statistics.median(runs),
+        mean=statistics.mean(runs),
+        runs=runs
+    )
+
+def clearCaches():
+    clearConstructionsCache()
+    clearVariablesCache()
+    clearOutlineCache()
+
+def runBenchmarks(glyphCount, masterCount, librarySize, repeat):
+    library = makeLibrary(librarySize)
+    constructionsModule.defaultConstructions = library
+    # The library cache file is only used by the
+    # benchmark that measures it.
+    setLibraryCachePath(None)
+    clearCaches()
+    results = {}
+
+    def fontsSetup():
+        return makeFonts(glyphCount, masterCount, library)
+
+    fonts = fontsSetup()
+
+    # importing
+
+    results["import.lazyBones"] = timeImport("lazyBones", repeat)
+    results["import.lazyBones.constructions"] = timeImport("lazyBones.constructions", repeat)
+
+    # loading
+
+    def loadCold(context):
+        clearCaches()
+        for font in fonts:
+            loadConstructions(font.defaultLayer)
+
+    def loadWarm(context):
+        for font in fonts:
+            loadConstructions(font.defaultLayer)
+
+    results["loadConstructions.cold"] = timeFunction(loadCold, repeat)
+    results["loadConstructions.warm"] = timeFunction(loadWarm, repeat)
+
+    cacheFolder = tempfile.mkdtemp()
+    cachePath = os.path.join(cacheFolder, "compiledConstructions.pickle")
+    setLibraryCachePath(cachePath)
+    loadCold(None)
+
+    def loadCachedSetup():
+        clearCaches()
+        # Setting the path again forgets the libraries
+        # read from the file, so the file is read again.
+        setLibraryCachePath(cachePath)
+
+    results["loadConstructions.libraryCache"] = timeFunction(loadWarm, repeat, loadCachedSetup)
+    setLibraryCachePath(None)
+    os.remove(cachePath)
+    os.rmdir(cacheFolder)
+
+    # guessing
+
+    glyphNames = []
+    for name in fonts[0].glyphOrder:
+        glyphNames.extend([name, name + ".sc", name + ".ss01"])
+
+    def guess(context):
+        guessConstructionsForGlyphNames(glyphNames, fonts[0].defaultLayer)
+
+    results["guessConstructionsForGlyphNames"] = timeFunction(guess, repeat)
+
+    # building
+
+    def buildSetup():
+        clearOutlineCache()
+        return cachedBuildSetup()
+
+    def cachedBuildSetup():
+        font = makeFonts(glyphCount, 1, library)[0]
+        constructions = loadConstructions(font.defaultLayer)
+        order, _ = ConstructionGraph(constructions).getBuildOrder(constructions.keys())
+        return font, constructions, order
+
+    def build(context):
+        font, constructions, order = context
+        for name in order:
+            data = constructions[name]
+            buildGlyphFromConstruction(
+                font.defaultLayer.newGlyph(name, clear=False),
+                construction=data.construction,
+                decompose=data.decompose,
+                clear=data.clear
+            )
+
+    results["buildGlyphFromConstruction"] = timeFunction(build, repeat, setup=buildSetup)
+    # The outlines built above are in the outline cache.
+    results["buildGlyphFromConstruction.outlineCache"] = timeFunction(build, repeat, setup=cachedBuildSetup)
+
+    # font sheet
+
+    def sheetSetup():
+        fonts = fontsSetup()
+        return lazyBones.LazyBonesFontSheet(fonts[0])
+
+    def populate(context):
+        sheet = context
+        for value in (False, True, False, True):
+            sheet.w.setItemValue("showExistingGlyphsCheckbox", value)
+            sheet.populateconstructionTable()
+
+    results["populateconstructionTable"] = timeFunction(populate, repeat, setup=sheetSetup)
+
+    def sheetBuildSetup():
+        clearOutlineCache()
+        sheet = sheetSetup()
+        sheet.w.setItemValue("showExistingGlyphsCheckbox", True)
+        sheet.populateconstructionTable()
+        table = sheet.w.getItem("constructionTable")
+        table.setSelectedIndexes(range(len(table.get())))
+        return sheet
+
+    def sheetBuildCurrentFont(context):
+        sheet = context
+        sheet._build([sheet.font])
+        runPendingCalls()
+
+    def sheetBuildAllFonts(context):
+        sheet = context
+        sheet._build(AllFonts())
+        runPendingCalls()
+
+    results["_build.currentFont"] = timeFunction(sheetBuildCurrentFont, repeat, setup=sheetBuildSetup)
+    results["_build.allFonts"] = timeFunction(sheetBuildAllFonts, repeat, setup=sheetBuildSetup)
+
+    closeAllFonts()
+    return results
+
+
+# -------
+# Reports
+# -------
+
+def getLabel():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=repositoryPath,
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def printResults(results):
+    width = max(len(name) for name in results)
+    for name, data in results.items():
+        print(f"{name.ljust(width)}  median {data['median'] * 1000:10.2f} ms  min {data['min'] * 1000:10.2f} ms")
+
+def compareResults(beforePath, afterPath):
+    with open(beforePath) as f:
+        before = json.load(f)
+    with open(afterPath) as f:
+        after = json.load(f)
+    if before["parameters"] != after["parameters"]:
+        print("Warning: the results were made with different parameters.")
+    names = [name for name in after["results"] if name in before["results"]]
+    width = max(len(name) for name in names)
+    for name in names:
+        b = before["results"][name]["median"]
+        a = after["results"][name]["median"]
+        ratio = a / b if b else float("inf")
+        print(f"{name.ljust(width)}  {b * 1000:10.2f} ms -> {a * 1000:10.2f} ms  x{ratio:.2f}")
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Run the Lazy Bones benchmarks.")
+    parser.add_argument("--glyphs", type=int, default=500, help="Glyphs per font.")
+    parser.add_argument("--masters", type=int, default=4, help="Number of fonts.")
+    parser.add_argument("--library", type=int, default=300, help="Constructions in the library.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--label", help="A label for the results. Defaults to the git revision.")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BEFORE", "AFTER"),
+        help="Compare two result files instead of running."
+    )
+    options = parser.parse_args(args)
+    if options.compare:
+        compareResults(*options.compare)
+        return 0
+    parameters = dict(
+        glyphs=options.glyphs,
+        masters=options.masters,
+        library=options.library,
+        repeat=options.repeat
+    )
+    results = runBenchmarks(options.glyphs, options.masters, options.library, options.repeat)
+    printResults(results)
+    if options.output:
+        label = options.label
+        if label is None:
+            label = getLabel()
+        data = dict(
+            label=label,
+            time=time.strftime("%Y-%m-%dT%H:%M:%S"),
+            python=platform.python_version(),
+            platform=platform.platform(),
+            parameters=parameters,
+            results=results
+        )
+        with open(options.output, "w") as f:
+            json.dump(data, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
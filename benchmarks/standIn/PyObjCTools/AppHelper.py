@@ -0,0 +1,24 @@
+"""
+A stand-in for the parts of PyObjCTools.AppHelper that
+Lazy Bones uses. There is no run loop, so calls are
+queued and run by `runPendingCalls`.
+"""
+
+import time
+
+_pendingCalls = []
+
+def callLater(delay, func, *args, **kwargs):
+    _pendingCalls.append((time.perf_counter() + delay, func, args, kwargs))
+
+def runPendingCalls():
+    """
+    Run the queued calls, and the calls they
+    queue, until there are none left.
+    """
+    while _pendingCalls:
+        when, func, args, kwargs = _pendingCalls.pop(0)
+        delay = when - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        func(*args, **kwargs)
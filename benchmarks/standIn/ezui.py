@@ -0,0 +1,145 @@
+"""
+A stand-in for the parts of ezui that Lazy Bones
+uses. Windows are never shown. Item values are kept
+in plain objects so that controllers can be driven
+from the benchmarks.
+"""
+
+
+# -----
+# Items
+# -----
+
+class Item:
+
+    def __init__(self, value=None):
+        self._value = value
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+
+    def enable(self, value):
+        self._enabled = value
+
+
+class Table(Item):
+
+    def __init__(self, value=None):
+        if value is None:
+            value = []
+        super().__init__(value)
+        self._selection = []
+
+    def set(self, value):
+        self._value = list(value)
+        self._selection = []
+
+    def getSelectedIndexes(self):
+        return list(self._selection)
+
+    def setSelectedIndexes(self, indexes):
+        self._selection = list(indexes)
+
+    def getSelectedItems(self):
+        return [self._value[index] for index in self._selection]
+
+
+# -------
+# Windows
+# -------
+
+
+class _Window:
+
+    def __init__(self, content="", descriptionData=None, controller=None, **kwargs):
+        if descriptionData is None:
+            descriptionData = {}
+        self._controller = controller
+        self._items = {}
+        for line in content.splitlines():
+            line = line.strip()
+            if "@" not in line:
+                continue
+            identifier = line.rsplit("@", 1)[1].strip()
+            description = descriptionData.get(identifier, {})
+            if "columnDescriptions" in description:
+                item = Table(description.get("items"))
+            else:
+                value = description.get("value")
+                if value is None and line.startswith("[X]"):
+                    value = True
+                elif value is None and line.startswith("[ ]"):
+                    value = False
+                item = Item(value)
+            self._items[identifier] = item
+
+    def open(self):
+        pass
+
+    def close(self):
+        if self._controller is not None:
+            self._controller.destroy()
+
+    def getItem(self, identifier):
+        return self._items[identifier]
+
+    def getItemValue(self, identifier):
+        return self._items[identifier].get()
+
+    def setItemValue(self, identifier, value):
+        self._items[identifier].set(value)
+
+
+class EZWindow(_Window):
+    pass
+
+
+class EZSheet(_Window):
+    pass
+
+
+class EZPopUp(_Window):
+    pass
+
+
+# -----------
+# Controllers
+# -----------
+
+class ProgressBar:
+
+    def __init__(self, text="", maxValue=0, **kwargs):
+        self.text = text
+        self.maxValue = maxValue
+        self.value = 0
+
+    def setText(self, text):
+        self.text = text
+
+    def increment(self, value=1):
+        self.value += value
+
+    def close(self):
+        pass
+
+
+class WindowController:
+
+    def __init__(self, *args, **kwargs):
+        self.build(*args, **kwargs)
+        self.started()
+
+    def build(self):
+        pass
+
+    def started(self):
+        pass
+
+    def destroy(self):
+        pass
+
+    def startProgress(self, text="", maxValue=0, parent=None, **kwargs):
+        return ProgressBar(text=text, maxValue=maxValue)
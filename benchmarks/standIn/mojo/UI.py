@@ -0,0 +1,20 @@
+class _Window:
+
+    def __init__(self):
+        self.w = None
+
+    def getGlyphView(self):
+        return None
+
+
+def CurrentFontWindow():
+    return _Window()
+
+def CurrentGlyphWindow():
+    return _Window()
+
+
+class StatusInteractivePopUpWindow:
+
+    def __init__(self, *args, **kwargs):
+        pass
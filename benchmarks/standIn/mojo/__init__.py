@@ -0,0 +1,5 @@
+"""
+A stand-in for the parts of RoboFont's mojo that
+Lazy Bones uses. It is backed by fontParts and defcon
+and is only meant for running the benchmarks.
+"""
@@ -0,0 +1,11 @@
+_defaults = {}
+
+def registerExtensionDefaults(defaults):
+    for key, value in defaults.items():
+        _defaults.setdefault(key, value)
+
+def setExtensionDefault(key, value):
+    _defaults[key] = value
+
+def getExtensionDefault(key, fallback=None):
+    return _defaults.get(key, fallback)
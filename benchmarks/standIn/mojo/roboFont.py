@@ -0,0 +1,80 @@
+from fontParts.fontshell import RFont as _RFont, RLayer as _RLayer, RGlyph as _RGlyph
+
+
+# -------
+# Objects
+# -------
+
+class RGlyph(_RGlyph):
+
+    def prepareUndo(self, undoTitle=""):
+        pass
+
+    def performUndo(self):
+        pass
+
+
+class RLayer(_RLayer):
+
+    glyphClass = RGlyph
+
+
+class RFont(_RFont):
+
+    layerClass = RLayer
+
+
+# ----
+# Apps
+# ----
+
+_fonts = []
+_current = dict(
+    font=None,
+    glyph=None
+)
+
+def NewFont(familyName=None, styleName=None, showInterface=True):
+    font = RFont(showInterface=showInterface)
+    if familyName is not None:
+        font.info.familyName = familyName
+    if styleName is not None:
+        font.info.styleName = styleName
+    _fonts.append(font)
+    setCurrentFont(font)
+    return font
+
+def OpenFont(path, showInterface=True):
+    font = RFont(path, showInterface=showInterface)
+    _fonts.append(font)
+    setCurrentFont(font)
+    return font
+
+def AllFonts():
+    return list(_fonts)
+
+def CurrentFont():
+    return _current["font"]
+
+def CurrentGlyph():
+    return _current["glyph"]
+
+def setCurrentFont(font):
+    """
+    Stand-in only. Make font the current font.
+    """
+    _current["font"] = font
+
+def setCurrentGlyph(glyph):
+    """
+    Stand-in only. Make glyph the current glyph.
+    """
+    _current["glyph"] = glyph
+
+def closeAllFonts():
+    """
+    Stand-in only. Forget all open fonts.
+    """
+    del _fonts[:]
+    _current["font"] = None
+    _current["glyph"] = None
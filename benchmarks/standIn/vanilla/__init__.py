@@ -0,0 +1,6 @@
+"""
+A stand-in for the parts of vanilla that
+Lazy Bones uses. Only meant for the benchmarks.
+"""
+
+from vanilla import dialogs
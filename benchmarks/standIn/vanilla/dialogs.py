@@ -0,0 +1,12 @@
+messages = []
+
+def message(messageText="", informativeText="", **kwargs):
+    messages.append((messageText, informativeText))
+
+askYesNoAnswer = True
+
+def askYesNo(messageText="", informativeText="", resultCallback=None, **kwargs):
+    messages.append((messageText, informativeText))
+    if resultCallback is not None:
+        resultCallback(askYesNoAnswer)
+    return askYesNoAnswer
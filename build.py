@@ -22,6 +22,10 @@ menuItems = [
         path="menu_showDefaults.py",
         preferredName="Edit Constructions"
     ),
+    dict(
+        path="menu_toggleLiveRebuild.py",
+        preferredName="Live Rebuild On/Off"
+    ),
 ]
 
 mainScript = "launch.py"
@@ -1 +1,5 @@
-import lazyBones
\ No newline at end of file
+from mojo.extensions import getExtensionDefault
+from lazyBones.liveSubscriber import liveRebuildDefaultsKey, startLiveRebuild
+
+if getExtensionDefault(liveRebuildDefaultsKey, False):
+    startLiveRebuild()
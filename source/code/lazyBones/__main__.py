@@ -0,0 +1,278 @@
+"""
+Build Lazy Bones constructions into UFOs without RoboFont.
+
+    python -m lazyBones build MyFont-Regular.ufo MyFont.designspace -g b -g d
+
+Fonts are opened, built, saved and closed one at a time.
+All of the layers that are built in a font are built in
+one pass.
+"""
+
+import sys
+import argparse
+from lazyBones.constructions import ConstructionsLoader, buildConstructionsInLayers
+from lazyBones.validation import validateLayers, formatMissingSources
+
+
+# -------
+# Sources
+# -------
+
+def getSources(paths, layerNames=None):
+    """
+    Get the sources for the given UFO and designspace
+    paths. This yields a tuple of form:
+
+    ```
+    ("UFO path", ["layer name" or None])
+    ```
+
+    for each UFO. A layer name of None indicates the
+    default layer. Designspace sources in the same UFO,
+    such as sparse masters in layers, are grouped so that
+    the UFO is built in one pass. layerNames are used for
+    UFO paths. If it is None, the default layer is used.
+    """
+    if layerNames is None:
+        layerNames = [None]
+    sources = {}
+    for path in paths:
+        if path.lower().endswith(".designspace"):
+            from fontTools.designspaceLib import DesignSpaceDocument
+            document = DesignSpaceDocument.fromfile(path)
+            pathSources = [
+                (source.path, source.layerName)
+                for source in document.sources
+            ]
+        else:
+            pathSources = [
+                (path, layerName)
+                for layerName in layerNames
+            ]
+        for sourcePath, layerName in pathSources:
+            sourceLayerNames = sources.setdefault(sourcePath, [])
+            if layerName not in sourceLayerNames:
+                sourceLayerNames.append(layerName)
+    return list(sources.items())
+
+def findUnknownLayerNames(path, layerNames):
+    """
+    Get the names in layerNames that aren't layers
+    in the UFO at path. None and "*" are skipped.
+    """
+    from fontTools.ufoLib import UFOReader
+    reader = UFOReader(path, validate=False)
+    existing = reader.getLayerNames()
+    return [
+        layerName
+        for layerName in layerNames
+        if layerName not in (None, "*") and layerName not in existing
+    ]
+
+
+# --------
+# Building
+# --------
+
+def getGlyphSelection(layers, glyphNames=None):
+    """
+    Get the glyph names to build in the layers.
+    Names that are not defined in the library but can
+    be guessed in any of the layers, such as `a.sc`, are
+    included. If glyphNames is None, every construction
+    in the library is selected. This returns a tuple
+    of form:
+
+    ```
+    (
+        [glyph names],
+        [names without a construction]
+    )
+    ```
+    """
+    loaders = [ConstructionsLoader(layer) for layer in layers]
+    if glyphNames is None:
+        return list(loaders[0].constructions.keys()), []
+    selected = []
+    missing = []
+    for name in glyphNames:
+        for loader in loaders:
+            if loader.guessConstructionForGlyphName(name) is not None:
+                selected.append(name)
+                break
+        else:
+            missing.append(name)
+    return selected, missing
+
+def buildSource(path, layerNames=None, glyphNames=None, save=True, skipUnchanged=True, force=False):
+    """
+    Build the constructions into the given layers of the
+    UFO at path in one pass. A layer name of None, or
+    "*", indicates the default layer or all layers. If
+    skipUnchanged is True, glyphs whose fingerprint hasn't
+    changed are not built. The constructions are checked
+    before building and, unless force is True, nothing is
+    built if any of them has missing sources or glyphs
+    that depend on each other. The UFO is only saved if
+    something was built. This returns a tuple of form:
+
+    ```
+    (
+        [("layer name", [built glyph names])],
+        [names without a construction],
+        "problems"
+    )
+    ```
+
+    The problems are formatted with `formatMissingSources`
+    and are an empty string if there are none.
+    """
+    from fontParts.world import OpenFont
+    if layerNames is None:
+        layerNames = [None]
+    font = OpenFont(path, showInterface=False)
+    try:
+        layers = []
+        for layerName in layerNames:
+            if layerName is None:
+                found = [font.defaultLayer]
+            elif layerName == "*":
+                found = font.layers
+            else:
+                found = [font.getLayer(layerName)]
+            for layer in found:
+                if layer not in layers:
+                    layers.append(layer)
+        selected, missing = getGlyphSelection(layers, glyphNames)
+        problems = validateLayers(layers, selected, guessMissing=True)
+        # The font is closed when this returns,
+        # so the problems are formatted here.
+        problems = formatMissingSources(problems)
+        if problems and not force:
+            return [], missing, problems
+        built = buildConstructionsInLayers(
+            layers,
+            selected,
+            undo=False,
+            skipUnchanged=skipUnchanged,
+            guessMissing=True
+        )
+        if save and any(built):
+            font.save()
+        built = [
+            (layer.name, names)
+            for layer, names in zip(layers, built)
+        ]
+    finally:
+        font.close()
+    return built, missing, problems
+
+
+# ------------
+# Command Line
+# ------------
+
+def readGlyphNames(path):
+    names = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                names.extend(line.split())
+    return names
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog="lazyBones",
+        description="Build Lazy Bones constructions without RoboFont."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    buildParser = subparsers.add_parser(
+        "build",
+        help="Build constructions into UFOs."
+    )
+    buildParser.add_argument(
+        "paths",
+        nargs="+",
+        metavar="PATH",
+        help="UFO or designspace paths."
+    )
+    buildParser.add_argument(
+        "-g", "--glyph",
+        dest="glyphNames",
+        action="append",
+        metavar="NAME",
+        help="A glyph to build. May be given more than once."
+    )
+    buildParser.add_argument(
+        "--glyphs-file",
+        dest="glyphsFile",
+        metavar="PATH",
+        help="A file listing glyph names separated by white space."
+    )
+    buildParser.add_argument(
+        "-l", "--layer",
+        dest="layerNames",
+        action="append",
+        metavar="NAME",
+        help="A layer to build in UFO paths. May be given more than once. Defaults to the default layer."
+    )
+    buildParser.add_argument(
+        "--all-layers",
+        dest="allLayers",
+        action="store_true",
+        help="Build every layer in UFO paths."
+    )
+    buildParser.add_argument(
+        "-f", "--force",
+        action="store_true",
+        help="Build glyphs even if nothing they depend on has changed or their sources are missing."
+    )
+    buildParser.add_argument(
+        "-n", "--dry-run",
+        dest="dryRun",
+        action="store_true",
+        help="Build without saving the UFOs."
+    )
+    options = parser.parse_args(args)
+
+    glyphNames = options.glyphNames
+    if options.glyphsFile:
+        if glyphNames is None:
+            glyphNames = []
+        glyphNames += readGlyphNames(options.glyphsFile)
+
+    layerNames = options.layerNames
+    if options.allLayers:
+        layerNames = ["*"]
+
+    sources = getSources(options.paths, layerNames)
+    for path, sourceLayerNames in sources:
+        unknown = findUnknownLayerNames(path, sourceLayerNames)
+        if unknown:
+            buildParser.error(f"{path} has no layer named {', '.join(unknown)}")
+
+    status = 0
+    for path, sourceLayerNames in sources:
+        built, missing, problems = buildSource(
+            path,
+            layerNames=sourceLayerNames,
+            glyphNames=glyphNames,
+            save=not options.dryRun,
+            skipUnchanged=not options.force,
+            force=options.force
+        )
+        if problems:
+            print(problems, file=sys.stderr)
+            if not options.force:
+                print(f"{path}: not built. Use --force to build anyway.", file=sys.stderr)
+                status = 1
+        for layerName, names in built:
+            print(f"{path} ({layerName}): built {len(names)} glyphs.")
+        if missing:
+            print(f"{path}: no construction for {' '.join(missing)}", file=sys.stderr)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
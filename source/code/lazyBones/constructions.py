@@ -0,0 +1,1518 @@
+import re
+import sys
+import hashlib
+import weakref
+from collections import OrderedDict
+from fontTools.pens.recordingPen import RecordingPointPen
+from fontTools.agl import toUnicode
+from glyphConstruction import GlyphConstructionBuilder, ParseGlyphConstructionListFromString, parseGlyphName
+from lazyBones.graph import ConstructionGraph, getConstructionReferences
+from lazyBones.variables import getVariableValues, getVariableNames
+from lazyBones.expressions import findExpressions, getFontMetrics
+from lazyBones.profiling import getProfiler
+from lazyBones.fingerprints import getConstructionFingerprint, isGlyphUnchanged, storeFingerprint
+from lazyBones.libraryCache import getCachedLibrary, storeCachedLibrary
+from lazyBones.outlineCache import CachedOutline, getOutlineKey, getCachedOutline, storeCachedOutline
+
+# -------
+# Records
+# -------
+
+class Construction:
+
+    """
+    An immutable construction record. Records are shared
+    by every loader that resolves the same library, so
+    use `replace` to get a changed copy. For compatibility
+    with older scripts, which got dictionaries, records
+    can also be read like a dictionary with the fields
+    as keys: `record["construction"]`, `record.get`,
+    `"clear" in record`, `dict(record)` and so on.
+    """
+
+    __slots__ = ("name", "construction", "decompose", "clear")
+    fields = __slots__
+
+    def __init__(self, name, construction, decompose=False, clear=True):
+        setField = object.__setattr__
+        setField(self, "name", sys.intern(name))
+        setField(self, "construction", construction)
+        setField(self, "decompose", decompose)
+        setField(self, "clear", clear)
+
+    @classmethod
+    def fromData(cls, data):
+        """
+        Get a record from a record or a dictionary
+        with the same keys as the record fields.
+        """
+        if isinstance(data, cls):
+            return data
+        return cls(
+            data["name"],
+            data["construction"],
+            decompose=data.get("decompose", False),
+            clear=data.get("clear", True)
+        )
+
+    def replace(self, **changes):
+        """
+        Get a record with the given fields changed. If
+        nothing is different, the record itself is returned.
+        """
+        if all(getattr(self, field) == value for field, value in changes.items()):
+            return self
+        values = {field : getattr(self, field) for field in self.fields}
+        values.update(changes)
+        return Construction(**values)
+
+    def _values(self):
+        return (self.name, self.construction, self.decompose, self.clear)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Construction records are immutable.")
+
+    def __delattr__(self, name):
+        raise AttributeError("Construction records are immutable.")
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, dict):
+            return dict(self.items()) == other
+        if not isinstance(other, Construction):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __hash__(self):
+        return hash(self._values())
+
+    def __reduce__(self):
+        return (Construction, self._values())
+
+    def __repr__(self):
+        return f"<Construction {self.name} = {self.construction}>"
+
+    # ----------
+    # Dictionary
+    # ----------
+
+    def keys(self):
+        return self.fields
+
+    def values(self):
+        return self._values()
+
+    def items(self):
+        return tuple(zip(self.fields, self._values()))
+
+    def get(self, key, default=None):
+        if key not in self.fields:
+            return default
+        return getattr(self, key)
+
+    def __getitem__(self, key):
+        if key not in self.fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.fields
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+
+# -------------
+# Constructions
+# -------------
+
+def guessConstructionForGlyphName(glyphName, layer):
+    """
+    Guess the construction for the given glyph name
+    using the layer for variable calculations.
+    """
+    return getConstructionsLoader(layer).guessConstructionForGlyphName(glyphName, glyphNames=layer)
+
+def guessConstructionsForGlyphNames(glyphNames, layer):
+    """
+    Guess the constructions for the given glyph names
+    using the layer for variable calculations. This will
+    return a dictionary of form:
+
+    ```
+    {
+        "glyph name" : Construction or None
+    }
+    ```
+
+    The Construction records have name, construction,
+    decompose and clear attributes.
+    """
+    return dict(iterGuessConstructionsForGlyphNames(glyphNames, layer))
+
+def iterGuessConstructionsForGlyphNames(glyphNames, layer, skipMissing=False):
+    """
+    Guess the constructions for the glyph names one at a
+    time. glyphNames may be any iterable of names, such as
+    a font's glyph order or the lines of a file. Names are
+    stripped and empty names are skipped. This yields
+    a tuple of form:
+
+    ```
+    ("glyph name", Construction or None)
+    ```
+
+    for each name. If skipMissing is True, names without
+    a construction are not yielded.
+    """
+    loader = getConstructionsLoader(layer)
+    for glyphName in glyphNames:
+        glyphName = glyphName.strip()
+        if not glyphName:
+            continue
+        data = loader.guessConstructionForGlyphName(glyphName, glyphNames=layer)
+        if data is None and skipMissing:
+            continue
+        yield glyphName, data
+
+
+class ConstructionsLoader:
+
+    def __init__(self, layer, resolved=None):
+
+        self.layer = layer
+        if resolved is None:
+            resolved = _resolveLayerConstructions(layer)
+        self._resolved = resolved
+        self.constructions = dict(resolved)
+        self._matcher = None
+
+    def guessConstructionForGlyphName(self, name, glyphNames=None):
+        """
+        Get the construction for name or None. Names that
+        aren't in the library are matched by removing their
+        suffixes, by their AGL name and as ligatures. See
+        `ConstructionMatcher` for the rules. glyphNames is
+        a container of the existing glyph names for the
+        parts of ligatures. It defaults to the layer.
+        """
+        if self._matcher is None:
+            # The matcher module imports this module.
+            from lazyBones.matching import ConstructionMatcher
+            self._matcher = ConstructionMatcher(self.constructions)
+        if glyphNames is None:
+            glyphNames = self.layer
+        return self._matcher.match(name, glyphNames)
+
+# The loaders are kept by layer so that repeated
+# guesses reuse the loader and its matcher. A loader
+# is replaced when the constructions that the layer
+# resolves to change. The shared loaders don't keep
+# their layer, since the layer is the weak key and
+# would otherwise never be freed.
+
+_layerLoaders = weakref.WeakKeyDictionary()
+
+def getConstructionsLoader(layer):
+    """
+    Get a shared loader for the layer. The loader
+    and its constructions must not be modified and
+    its layer is None.
+    """
+    resolved = _resolveLayerConstructions(layer)
+    naked = layer.naked()
+    loader = _layerLoaders.get(naked)
+    if loader is None or loader._resolved is not resolved:
+        loader = ConstructionsLoader(None, resolved)
+        _layerLoaders[naked] = loader
+    return loader
+
+def buildGlyphFromConstruction(
+        glyph,
+        construction,
+        clear=True,
+        decompose=False,
+        undo=True,
+        skipUnchanged=False,
+        fingerprint=None,
+        recipes=None,
+        glyphHashes=None
+    ):
+    """
+    Build the glyph with the given construction.
+
+    Set undo to False when the glyph doesn't support
+    undo, for example in a font without an interface.
+
+    If skipUnchanged is True, the glyph is not built when
+    neither the construction nor anything it depends on
+    has changed since the glyph was last built and the
+    glyph hasn't been edited since. fingerprint may be
+    given if it has already been calculated. The
+    fingerprint is always stored in the glyph lib.
+
+    recipes may be a ConstructionRecipes for the layer
+    so that glyphs with the same construction share
+    the work of constructing it.
+
+    Built outlines are kept in the outline cache, so
+    building the same construction from the same glyphs
+    again, in any font, replays the stored outline.
+    glyphHashes is an optional dictionary of glyph
+    hashes, as for `getConstructionFingerprint`.
+
+    This returns True if the glyph was built.
+    """
+    profiler = getProfiler()
+    with profiler.glyph(glyph):
+        with profiler.phase("fingerprint"):
+            if fingerprint is None:
+                fingerprint = getConstructionFingerprint(
+                    glyph.layer,
+                    glyph.name,
+                    construction,
+                    decompose=decompose,
+                    clear=clear,
+                    glyphHashes=glyphHashes
+                )
+            if skipUnchanged and isGlyphUnchanged(glyph, fingerprint):
+                profiler.count("skipped")
+                return False
+        layer = glyph.layer
+        sourceConstruction = construction
+        postContructionFunction = None
+        if "# >>>" in construction:
+            construction, postContructionFunction = construction.split("# >>>")
+        # When the construction doesn't use the glyph's own
+        # outline and nothing changes the outline after it
+        # is drawn, the built outline is compared with the
+        # glyph's outline and the glyph is only cleared and
+        # drawn when they differ.
+        compareOutline = (
+            clear
+            and postContructionFunction is None
+            and glyph.name not in getConstructionReferences(construction)
+        )
+        if decompose:
+            construction = "*null = " + construction
+        else:
+            construction = "null = " + construction
+        if undo:
+            with profiler.phase("undo"):
+                glyph.prepareUndo("Lazy Bones")
+        if clear and not compareOutline:
+            with profiler.phase("clear"):
+                glyph.clear()
+        with profiler.phase("construct"):
+            built = None
+            if recipes is not None:
+                built = recipes.get(glyph.name, construction)
+            if built is None:
+                built = _constructOutline(layer, glyph.name, construction, glyphHashes, profiler)
+                if recipes is not None:
+                    recipes.store(glyph.name, construction, built)
+            else:
+                profiler.count("sharedRecipes")
+        outlineKind = "outline"
+        if compareOutline:
+            with profiler.phase("classify"):
+                outlineKind = classifyBuiltOutline(glyph, built)
+            with profiler.phase("clear"):
+                if outlineKind == "outline":
+                    glyph.clear()
+                else:
+                    profiler.count(outlineKind)
+                    _clearNonOutlineData(glyph)
+        with profiler.phase("attributes"):
+            # name = built.name
+            glyph.unicode = built.unicode
+            glyph.note = built.note
+            #dest.markColor = built.mark
+            glyph.width = built.width
+        if glyph.unicode is None:
+            with profiler.phase("autoUnicodes"):
+                autoUnicodes(glyph)
+        if outlineKind == "outline":
+            with profiler.phase("draw"):
+                built.drawPoints(glyph.getPointPen())
+        if profiler.active:
+            profiler.count("glyphs")
+            profiler.count("contours", len(glyph.contours))
+            profiler.count("components", len(glyph.components))
+        if postContructionFunction is not None:
+            applyPostConstructionFunctions(glyph, postContructionFunction, profiler)
+        with profiler.phase("fingerprint"):
+            storeFingerprint(
+                glyph,
+                fingerprint,
+                construction=sourceConstruction,
+                decompose=decompose,
+                clear=clear,
+                edited=_isEditedConstruction(layer, glyph.name, sourceConstruction, decompose, clear)
+            )
+        if undo:
+            with profiler.phase("undo"):
+                glyph.performUndo()
+    return True
+
+def _isEditedConstruction(layer, name, construction, decompose, clear):
+    data = getConstructionsLoader(layer).constructions.get(name)
+    if data is None:
+        return True
+    return (data.construction, data.decompose, data.clear) != (construction, decompose, clear)
+
+def _constructOutline(layer, name, construction, glyphHashes, profiler):
+    key = getOutlineKey(layer, name, construction, glyphHashes)
+    if key is None:
+        return GlyphConstructionBuilder(construction, getConstructionSource(layer))
+    built = getCachedOutline(key)
+    if built is not None:
+        profiler.count("cachedOutlines")
+        return built
+    built = GlyphConstructionBuilder(construction, getConstructionSource(layer))
+    built = CachedOutline.fromBuilt(built)
+    storeCachedOutline(key, built)
+    return built
+
+def classifyBuiltOutline(glyph, built):
+    """
+    Compare the outline of a built construction with
+    the outline of the glyph, ignoring identifiers.
+    This returns "widthOnly" if neither has an outline,
+    such as a space built from `space ^ space * 0.45`,
+    "unchangedOutline" if the outlines are the same and
+    "outline" if they differ. The outlines are only
+    recorded and compared point by point when they
+    have as many contours and components.
+    """
+    naked = glyph.naked()
+    glyphCount = len(naked) + len(naked.components)
+    if isinstance(built, CachedOutline):
+        builtOperations = built.points
+    elif glyphCount:
+        pen = RecordingPointPen()
+        built.drawPoints(pen)
+        builtOperations = pen.value
+    else:
+        # There is nothing to compare with, so an
+        # outline that isn't recorded is just drawn.
+        return "outline"
+    builtCount = sum(
+        1
+        for methodName, args, kwargs in builtOperations
+        if methodName in ("beginPath", "addComponent")
+    )
+    if not glyphCount:
+        if builtCount:
+            return "outline"
+        return "widthOnly"
+    if glyphCount != builtCount:
+        return "outline"
+    if _getOutlineOperations(naked) == _normalizeOperations(builtOperations):
+        return "unchangedOutline"
+    return "outline"
+
+def _getOutlineOperations(drawable):
+    pen = RecordingPointPen()
+    drawable.drawPoints(pen)
+    return _normalizeOperations(pen.value)
+
+def _normalizeOperations(operations):
+    return [
+        (
+            methodName,
+            args,
+            {key : value for key, value in kwargs.items() if key != "identifier"}
+        )
+        for methodName, args, kwargs in operations
+    ]
+
+def _clearNonOutlineData(glyph):
+    # Clearing removes more than the outline, so
+    # a glyph that isn't cleared loses the rest.
+    naked = glyph.naked()
+    if naked.anchors:
+        naked.clearAnchors()
+    if naked.guidelines:
+        naked.clearGuidelines()
+    if naked.image.fileName is not None:
+        naked.clearImage()
+
+class ConstructionRecipes:
+
+    """
+    Constructed glyphs shared by the glyphs in a layer
+    that have the same construction, such as the accents
+    that are all built from `macron ^ macron`. Each unique
+    construction is constructed once and drawn into every
+    glyph that uses it.
+
+    A construction is forgotten when one of the glyphs it
+    references is built, so call `glyphChanged` after
+    building a glyph. Constructions that reference the
+    glyph being built are never shared, since they depend
+    on the glyph's own outline.
+    """
+
+    def __init__(self):
+        self._built = {}
+        self._referencedBy = {}
+
+    def _getKey(self, name, construction):
+        references = getConstructionReferences(construction.split("=", 1)[1])
+        if name in references:
+            return None, references
+        return " ".join(construction.split()), references
+
+    def get(self, name, construction):
+        key, references = self._getKey(name, construction)
+        if key is None:
+            return None
+        return self._built.get(key)
+
+    def store(self, name, construction, built):
+        key, references = self._getKey(name, construction)
+        if key is None:
+            return
+        self._built[key] = built
+        for reference in references:
+            self._referencedBy.setdefault(reference, set()).add(key)
+
+    def glyphChanged(self, name):
+        for key in self._referencedBy.pop(name, ()):
+            self._built.pop(key, None)
+
+class LayerFont:
+
+    """
+    A font that gets its glyphs from one of its layers,
+    so that glyph construction builds from the glyphs in
+    that layer. Everything else comes from the font.
+    """
+
+    def __init__(self, layer):
+        self._layer = layer
+        self._font = layer.font
+
+    def __getattr__(self, attr):
+        return getattr(self._font, attr)
+
+    def __getitem__(self, name):
+        return self._layer[name]
+
+    def __contains__(self, name):
+        return name in self._layer
+
+    def __iter__(self):
+        return iter(self._layer)
+
+    def __len__(self):
+        return len(self._layer)
+
+    def keys(self):
+        return self._layer.keys()
+
+    @property
+    def unicodeData(self):
+        return self._layer.unicodeData
+
+def getConstructionSource(layer):
+    """
+    Get the object that glyph construction should
+    get glyphs from to build in the layer.
+    """
+    layer = layer.naked()
+    font = layer.font
+    if layer is font.layers.defaultLayer:
+        return font
+    return LayerFont(layer)
+
+def autoUnicodes(glyph):
+    """
+    Set the unicodes of the glyph based on its name.
+    Glyphs in fonts without an interface don't implement
+    autoUnicodes, so the name is converted with the AGL
+    rules in that case.
+    """
+    try:
+        glyph.autoUnicodes()
+    except NotImplementedError:
+        text = toUnicode(glyph.name)
+        if len(text) == 1:
+            glyph.unicodes = [ord(text)]
+
+def buildConstructionsInLayer(
+        layer,
+        glyphNames,
+        modifiedConstructions=None,
+        progressCallback=None,
+        undo=True,
+        skipUnchanged=False
+    ):
+    """
+    Build the constructions for the given glyph names
+    in the layer. The constructions are loaded with the
+    variables for the layer and built in dependency order.
+
+    modifiedConstructions is an optional dictionary of
+    Construction records, or dictionaries with the same
+    keys, that should be used instead of the loaded
+    constructions. progressCallback, if given,
+    is called with each glyph name before it is built.
+    If skipUnchanged is True, glyphs whose fingerprint
+    hasn't changed since they were last built are skipped.
+
+    This returns a list of the names that were built.
+    """
+    steps = iterBuildConstructionsInLayer(
+        layer,
+        glyphNames,
+        modifiedConstructions=modifiedConstructions,
+        progressCallback=progressCallback,
+        undo=undo,
+        skipUnchanged=skipUnchanged
+    )
+    return [
+        name
+        for name, built in steps
+        if built
+    ]
+
+def iterBuildConstructionsInLayer(
+        layer,
+        glyphNames,
+        modifiedConstructions=None,
+        progressCallback=None,
+        undo=True,
+        skipUnchanged=False
+    ):
+    """
+    The same as `buildConstructionsInLayer` but as a
+    generator that builds one glyph at a time and yields
+    a tuple of form:
+
+    ```
+    ("glyph name", built boolean)
+    ```
+
+    after each glyph. Closing the generator stops the
+    build between glyphs and finishes the batch, so every
+    glyph that was built is complete and undoable.
+    """
+    steps = iterBuildConstructionsInLayers(
+        [layer],
+        glyphNames,
+        modifiedConstructions=modifiedConstructions,
+        progressCallback=progressCallback,
+        undo=undo,
+        skipUnchanged=skipUnchanged
+    )
+    try:
+        for layer, name, built in steps:
+            yield name, built
+    finally:
+        steps.close()
+
+def buildConstructionsInLayers(
+        layers,
+        glyphNames,
+        modifiedConstructions=None,
+        progressCallback=None,
+        undo=True,
+        skipUnchanged=False,
+        guessMissing=False
+    ):
+    """
+    Build the constructions for the given glyph names
+    in each of the layers in one pass. The layers may
+    belong to one or more fonts. The constructions are
+    loaded with the variables for each layer and the
+    glyphs are built from the glyphs in the same layer.
+
+    The library is parsed once and the build order is
+    shared by the layers whose constructions reference
+    the same glyphs. Each font is built in one batch.
+    The arguments are the same as for
+    `buildConstructionsInLayer`. If guessMissing is True,
+    the constructions for names that aren't in the library,
+    such as `a.sc`, are guessed with the variables for
+    each layer.
+
+    This returns a list with a list of the
+    names that were built for each layer.
+    """
+    layers = list(layers)
+    built = [[] for layer in layers]
+    indexes = {
+        id(layer.naked()) : index
+        for index, layer in enumerate(layers)
+    }
+    steps = iterBuildConstructionsInLayers(
+        layers,
+        glyphNames,
+        modifiedConstructions=modifiedConstructions,
+        progressCallback=progressCallback,
+        undo=undo,
+        skipUnchanged=skipUnchanged,
+        guessMissing=guessMissing
+    )
+    for layer, name, wasBuilt in steps:
+        if wasBuilt:
+            built[indexes[id(layer.naked())]].append(name)
+    return built
+
+def iterBuildConstructionsInLayers(
+        layers,
+        glyphNames,
+        modifiedConstructions=None,
+        progressCallback=None,
+        undo=True,
+        skipUnchanged=False,
+        guessMissing=False,
+        openBatches=None
+    ):
+    """
+    The same as `buildConstructionsInLayers` but as a
+    generator that yields a tuple of form:
+
+    ```
+    (layer, "glyph name", built boolean)
+    ```
+
+    after each glyph.
+
+    Each font is built in a BatchBuild, which holds
+    notifications and keeps undo open until it finishes.
+    openBatches may be a list that the BatchBuild is
+    added to while it is open, so that a caller that
+    returns to the run loop between steps can call its
+    `finish` method first.
+    """
+    if modifiedConstructions is None:
+        modifiedConstructions = {}
+    modifiedConstructions = {
+        name : Construction.fromData(data)
+        for name, data in modifiedConstructions.items()
+    }
+    glyphNames = set(glyphNames)
+    profiler = getProfiler()
+    # Layers with the same dependencies share an order.
+    # That is almost always every layer, since variables
+    # and expressions only change the numbers.
+    orders = {}
+    fonts = {}
+    for layer in layers:
+        with profiler.font(layer.font):
+            constructions = {}
+            with profiler.phase("loadConstructions"):
+                loader = ConstructionsLoader(layer)
+            for name, data in loader.constructions.items():
+                if name in glyphNames:
+                    constructions[name] = data
+            constructions.update(modifiedConstructions)
+            if guessMissing:
+                for name in glyphNames:
+                    if name in constructions:
+                        continue
+                    data = loader.guessConstructionForGlyphName(name, glyphNames=layer)
+                    if data is not None:
+                        constructions[name] = data.replace(name=name)
+            with profiler.phase("buildOrder"):
+                graph = ConstructionGraph(constructions)
+                key = tuple(sorted(graph.dependencies.items()))
+                order = orders.get(key)
+                if order is None:
+                    order, _ = graph.getBuildOrder(constructions.keys())
+                    orders[key] = order
+        font = layer.font
+        key = id(font.naked())
+        if key not in fonts:
+            fonts[key] = (font, [])
+        fonts[key][1].append((layer, constructions, order))
+    for font, plans in fonts.values():
+        with BatchBuild(font, undo=undo) as batch:
+            if openBatches is not None:
+                openBatches.append(batch)
+            try:
+                for layer, constructions, order in plans:
+                    glyphHashes = {}
+                    recipes = ConstructionRecipes()
+                    for name in order:
+                        data = constructions[name]
+                        if progressCallback is not None:
+                            progressCallback(name)
+                        with profiler.font(font):
+                            built = _buildConstructionInBatch(
+                                batch,
+                                layer,
+                                name,
+                                data,
+                                skipUnchanged,
+                                glyphHashes,
+                                recipes,
+                                profiler
+                            )
+                        yield layer, name, built
+            finally:
+                if openBatches is not None:
+                    openBatches.remove(batch)
+
+def _buildConstructionInBatch(batch, layer, name, data, skipUnchanged, glyphHashes, recipes, profiler):
+    fingerprint = None
+    if skipUnchanged:
+        with profiler.phase("fingerprint"):
+            fingerprint = getConstructionFingerprint(
+                layer,
+                name,
+                data.construction,
+                decompose=data.decompose,
+                clear=data.clear,
+                glyphHashes=glyphHashes
+            )
+            unchanged = name in layer and isGlyphUnchanged(layer[name], fingerprint)
+        if unchanged:
+            profiler.count("skipped")
+            return False
+    glyph = batch.getGlyph(layer, name)
+    buildGlyphFromConstruction(
+        glyph,
+        construction=data.construction,
+        decompose=data.decompose,
+        clear=data.clear,
+        undo=False,
+        fingerprint=fingerprint,
+        recipes=recipes,
+        glyphHashes=glyphHashes
+    )
+    batch.glyphChanged(glyph)
+    recipes.glyphChanged(name)
+    glyphHashes.pop(name, None)
+    return True
+
+class BatchBuild:
+
+    """
+    A context for changing many glyphs in a font.
+
+    Notifications for the glyphs that are changed and
+    their layers are held until the context exits and
+    are then posted once, so observers such as open glyph
+    and font windows update only one time. RoboFont records
+    undo per glyph, so each glyph that is changed gets a
+    single undo step for the whole batch no matter how
+    many times it is changed.
+
+        with BatchBuild(font) as batch:
+            glyph = batch.getGlyph(font.defaultLayer, "b")
+            buildGlyphFromConstruction(glyph, "h + o", undo=False)
+            batch.glyphChanged(glyph)
+
+    Set undo to False for fonts that don't support undo.
+    Call `finish` to post the notifications and end the
+    undo of the glyphs changed so far without leaving
+    the context, such as before returning to the run
+    loop in the middle of a build.
+    """
+
+    def __init__(self, font, undo=True, title="Lazy Bones"):
+        self.font = font
+        self.undo = undo
+        self.title = title
+        self._glyphs = {}
+        self._layers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.finish()
+
+    def finish(self):
+        """
+        Post the held notifications and perform the undo
+        of the glyphs changed so far. The batch can still
+        be used, and glyphs changed after this get a new
+        undo step.
+        """
+        profiler = getProfiler()
+        with profiler.font(self.font):
+            self._finish(profiler)
+
+    def _finish(self, profiler):
+        try:
+            if self.undo:
+                with profiler.phase("undo"):
+                    for glyph in self._glyphs.values():
+                        glyph.performUndo()
+        finally:
+            # Holds are kept per object rather than for the
+            # whole font because the dispatcher checks each
+            # held notification against the others for its
+            # hold, which gets slow with thousands of them.
+            with profiler.phase("notifications"):
+                for glyph in self._glyphs.values():
+                    glyph.naked().releaseHeldNotifications()
+                for layer in self._layers.values():
+                    layer.releaseHeldNotifications()
+            self._glyphs = {}
+            self._layers = {}
+
+    def getGlyph(self, layer, name):
+        """
+        Get the glyph with name from the layer, creating
+        it if needed, and prepare it for undo.
+        """
+        key = (layer.name, name)
+        glyph = self._glyphs.get(key)
+        if glyph is not None:
+            return glyph
+        if layer.name not in self._layers:
+            naked = layer.naked()
+            naked.holdNotifications(note="Lazy Bones batch build")
+            self._layers[layer.name] = naked
+        glyph = layer.newGlyph(name, clear=False)
+        glyph.naked().holdNotifications(note="Lazy Bones batch build")
+        if self.undo:
+            glyph.prepareUndo(self.title)
+        self._glyphs[key] = glyph
+        return glyph
+
+    def glyphChanged(self, glyph):
+        """
+        Tell the batch that the glyph has been changed.
+        Cached representations such as bounds are normally
+        destroyed by the held notifications, so they are
+        destroyed here so that glyphs built later in the
+        batch don't see stale values.
+        """
+        glyph.naked().destroyAllRepresentations()
+
+def loadConstructions(layer):
+    """
+    Load the constructions with the variables
+    calculated from the given layer.
+
+    The construction text is parsed only once and the
+    result for each set of variable values is cached.
+    The returned dictionary is new but the immutable
+    Construction records in it are shared with the cache.
+    """
+    return dict(_resolveLayerConstructions(layer))
+
+def _resolveLayerConstructions(layer):
+    text = getConstructionsText()
+    variables = getVariableValues(layer)
+    fontMetrics = getFontMetrics(layer)
+    return resolveConstructions(text, variables, fontMetrics)
+
+# ------------------
+# User Constructions
+# ------------------
+
+# User constructions are added after the defaults so
+# that they can replace them. RoboFont keeps them in
+# the extension defaults. Outside of RoboFont there
+# are none unless they are set.
+
+_userConstructions = []
+_constructionsText = [None, None, None]
+
+def getUserConstructions():
+    """
+    Get the text of the user constructions.
+    """
+    if not _userConstructions:
+        try:
+            from mojo.extensions import getExtensionDefault
+        except ImportError:
+            text = ""
+        else:
+            text = getExtensionDefault(defaultsKey, "")
+        _userConstructions.append(text or "")
+    return _userConstructions[0]
+
+def setUserConstructions(text):
+    """
+    Set the text of the user constructions for this
+    session. This doesn't store the text in the
+    extension defaults.
+    """
+    _userConstructions[:] = [text]
+
+def getConstructionsText():
+    """
+    Get the default constructions followed
+    by the user constructions.
+    """
+    text = defaultConstructions
+    userText = getUserConstructions()
+    if not userText.strip():
+        return text
+    # The same text object is returned until either
+    # part changes so that its hash is remembered.
+    if _constructionsText[0] is not text or _constructionsText[1] is not userText:
+        _constructionsText[:] = [text, userText, text + "\n" + userText]
+    return _constructionsText[2]
+
+# ----------------------
+# Compiled Constructions
+# ----------------------
+
+variablePlaceholderTemplate = "__lazyBonesVariable_{name}__"
+
+def parseConstructionLine(construction):
+    """
+    Split a construction given by glyphConstruction's
+    parser into its glyph name and construction. A name
+    that starts with `*` is decomposed. This returns a
+    tuple of form:
+
+    ```
+    ("glyph name", "construction", decompose)
+    ```
+
+    The glyph name is None if the line doesn't have one.
+    """
+    name, construction = parseGlyphName(construction)
+    if name is None:
+        return None, construction, False
+    name = name.strip()
+    construction = construction.strip()
+    decompose = False
+    if name.startswith("*"):
+        name = name[1:]
+        decompose = True
+    if not name:
+        name = None
+    return name, construction, decompose
+
+class CompiledConstructionLibrary:
+
+    """
+    A construction library that has been parsed once.
+    References to variables are kept as placeholders
+    so that the library can be resolved with the values
+    for any layer without parsing the text again.
+    Backtick expressions are compiled once and are
+    evaluated when the library is resolved, so the
+    construction builder gets plain numbers.
+    """
+
+    def __init__(self, text, variableNames):
+        self.variableNames = tuple(variableNames)
+        self.placeholders = {
+            variableName : variablePlaceholderTemplate.format(name=variableName)
+            for variableName in self.variableNames
+        }
+        header = "\n".join([
+            f"${variableName} = {placeholder}"
+            for variableName, placeholder in self.placeholders.items()
+        ])
+        self.records = []
+        for construction in ParseGlyphConstructionListFromString(header + "\n" + text):
+            if not construction:
+                continue
+            name, construction, decompose = parseConstructionLine(construction)
+            if name is None:
+                continue
+            referencedVariables = tuple(
+                (variableName, placeholder)
+                for variableName, placeholder in self.placeholders.items()
+                if placeholder in construction
+            )
+            expressions = findExpressions(construction)
+            self.records.append((name, construction, decompose, referencedVariables, expressions))
+        # Constructions that resolve to the same text for
+        # different variable values share one record.
+        self.resolvedRecords = {}
+
+    def __getstate__(self):
+        # The resolved records are only shared
+        # within a session, so they aren't stored.
+        state = dict(self.__dict__)
+        state["resolvedRecords"] = {}
+        return state
+
+    def getUnresolvedConstructions(self):
+        """
+        Get a dictionary of the constructions with the
+        variable placeholders and the expressions left in
+        place. The values of the dictionary are
+        Construction records.
+        """
+        return {
+            name : Construction(name, construction, decompose=decompose)
+            for name, construction, decompose, referencedVariables, expressions in self.records
+        }
+
+    def resolve(self, variables, fontMetrics=None):
+        """
+        Fill in the variable values, evaluate the expressions
+        with the variable values and the font metrics and
+        return a dictionary of constructions. Expressions
+        that can't be evaluated are left in place.
+        The values of the dictionary are Construction records.
+        """
+        namespace = {}
+        if fontMetrics is not None:
+            namespace.update(fontMetrics)
+        for variableName, placeholder in self.placeholders.items():
+            namespace[placeholder] = variables[variableName]
+        evaluated = {}
+        constructions = {}
+        for name, construction, decompose, referencedVariables, expressions in self.records:
+            for text, expression in expressions:
+                if expression not in evaluated:
+                    evaluated[expression] = expression.evaluate(namespace)
+                value = evaluated[expression]
+                if value is not None:
+                    construction = construction.replace(text, str(value))
+            for variableName, placeholder in referencedVariables:
+                construction = construction.replace(placeholder, str(variables[variableName]))
+            key = (name, construction, decompose)
+            record = self.resolvedRecords.get(key)
+            if record is None:
+                record = self.resolvedRecords[key] = Construction(
+                    name,
+                    construction,
+                    decompose=decompose
+                )
+            constructions[name] = record
+        return constructions
+
+constructionsCacheLimit = 64
+
+_compiledLibraries = OrderedDict()
+_resolvedConstructions = OrderedDict()
+
+_lastHashedText = [None, None]
+
+def _hashText(text):
+    # The same text object is hashed on every load,
+    # so the last hash is remembered.
+    if _lastHashedText[0] is not text:
+        _lastHashedText[:] = [text, hashlib.sha1(text.encode("utf-8")).hexdigest()]
+    return _lastHashedText[1]
+
+def _cacheStore(cache, key, value):
+    cache[key] = value
+    while len(cache) > constructionsCacheLimit:
+        cache.popitem(last=False)
+
+def compileConstructions(text, variableNames=None):
+    """
+    Get the compiled library for the given construction
+    text. Compiled libraries are cached by a hash of the
+    text and the variable names, in memory and in the
+    library cache file. The names are sorted so that
+    the key doesn't depend on their order.
+    """
+    if variableNames is None:
+        variableNames = getVariableNames()
+    variableNames = tuple(sorted(variableNames))
+    key = (_hashText(text), variableNames)
+    library = _compiledLibraries.get(key)
+    if library is None:
+        library = getCachedLibrary(key)
+        if library is None:
+            library = CompiledConstructionLibrary(text, variableNames)
+            storeCachedLibrary(key, library)
+        _cacheStore(_compiledLibraries, key, library)
+    else:
+        _compiledLibraries.move_to_end(key)
+    return library
+
+def resolveConstructions(text, variables, fontMetrics=None):
+    """
+    Get the constructions defined in the text with the
+    given variable values and font metrics. Results are
+    cached by a hash of the text, the variable values
+    and the font metrics.
+    """
+    if fontMetrics is None:
+        fontMetrics = {}
+    variableNames = sorted(variables.keys())
+    key = (
+        _hashText(text),
+        tuple((variableName, variables[variableName]) for variableName in variableNames),
+        tuple(sorted(fontMetrics.items()))
+    )
+    constructions = _resolvedConstructions.get(key)
+    if constructions is None:
+        library = compileConstructions(text, variableNames)
+        constructions = library.resolve(variables, fontMetrics)
+        _cacheStore(_resolvedConstructions, key, constructions)
+    else:
+        _resolvedConstructions.move_to_end(key)
+    return constructions
+
+def clearConstructionsCache():
+    """
+    Remove all compiled and resolved constructions
+    from the cache.
+    """
+    _compiledLibraries.clear()
+    _resolvedConstructions.clear()
+    _layerLoaders.clear()
+
+# --------------------------
+# Post Contruction Functions
+# --------------------------
+
+# Post construction functions are called with the
+# glyph and the ContourMetrics of the glyph. The
+# metrics are calculated once for all of the
+# functions after a construction.
+
+def deleteSmallestContour(glyph, metrics):
+    """
+    Delete the contour with the smallest area.
+    """
+    metrics.removeContour(metrics.smallest())
+
+def deleteLargestContour(glyph, metrics):
+    """
+    Delete the contour with the largest area.
+    """
+    metrics.removeContour(metrics.largest())
+
+def deleteBottomContour(glyph, metrics):
+    """
+    Delete the contour with the lowest bottom.
+    """
+    metrics.removeContour(metrics.bottom())
+
+def deleteTopContour(glyph, metrics):
+    """
+    Delete the contour with the highest top.
+    """
+    metrics.removeContour(metrics.top())
+
+def deleteContour(glyph, metrics, index):
+    """
+    Delete the contour at index. Negative
+    indexes count from the last contour.
+    """
+    count = len(glyph.contours)
+    if index < 0:
+        index += count
+    if 0 <= index < count:
+        metrics.removeContour(index)
+
+postContructionFunctions = dict(
+    deleteSmallestContour=deleteSmallestContour,
+    deleteLargestContour=deleteLargestContour,
+    deleteBottomContour=deleteBottomContour,
+    deleteTopContour=deleteTopContour,
+    deleteContour=deleteContour
+)
+
+def registerPostConstructionFunction(name, function):
+    """
+    Register a function that can be called after a
+    construction with `# >>> name`. function is called
+    with the glyph, the ContourMetrics of the glyph and
+    any integer arguments given as `# >>> name(1)`.
+    It must remove contours with the metrics
+    so that they stay in sync with the glyph.
+    """
+    postContructionFunctions[name] = function
+
+def parsePostConstructionFunctions(text):
+    """
+    Parse the text after `# >>>` into a list of
+    (name, arguments) tuples. Functions are
+    separated by commas.
+    """
+    functions = []
+    for name, arguments in re.findall(r"(\w+)\s*(?:\(([^)]*)\))?", text):
+        arguments = tuple(
+            int(argument)
+            for argument in arguments.split(",")
+            if argument.strip()
+        )
+        functions.append((name, arguments))
+    return functions
+
+def applyPostConstructionFunctions(glyph, text, profiler=None):
+    """
+    Apply the post construction functions
+    in text to the glyph in order.
+    """
+    from lazyBones.contourMetrics import ContourMetrics
+    if profiler is None:
+        profiler = getProfiler()
+    functions = parsePostConstructionFunctions(text)
+    if not functions:
+        return
+    with profiler.phase("contourMetrics"):
+        metrics = ContourMetrics(glyph)
+    for name, arguments in functions:
+        function = postContructionFunctions[name]
+        with profiler.phase(name):
+            function(glyph, metrics, *arguments)
+
+# --------
+# Defaults
+# --------
+
+defaultsKey = "com.typesupply.LazyBones.constructions"
+
+defaultConstructions = """
+# ---------
+# Uppercase
+# ---------
+
+*A = V + H ^ V
+*B = R ^ R
+*C = G ^ G
+*D = E + O ^ O
+*E = H ^ H
+*F = E ^ E
+*G = O ^ O
+*H = O ^ O
+*I = H & H
+*J = I ^ I
+*K = H + V ^ H
+*L = F ^ F
+*M = H ^ H
+*N = H ^ H
+*O = H
+*P = R ^ R
+*Q = O ^ O
+*R = H ^ H
+*S = O ^ O
+*T = F ^ F
+*U = H ^ H
+*V = H ^ H
+*W = V & V ^ V, V
+*X = V ^ V
+*Y = I + V ^ V
+*Z = L ^ L
+*AE = A & E ^ A, E
+Eth = D + hyphen ^ D
+Oslash = O + slash @ center, none ^ O
+*Thorn = P ^ P
+Hbar = H + emdash @ center, none ^ H
+IJ = I & J ^ I, J
+Lslash = L + hyphen ^ L
+*Eng = N + J ^ N
+*OE = D & E ^ D', E
+Tbar = T + hyphen @ center, none ^ T
+Dcroat = Eth ^ Eth
+
+# ---------
+# Lowercase
+# ---------
+
+*a = u + n ^ u
+*b = h + o ^ n, o
+*c = e ^ e
+*d = b @ ~none, none ^ b', b'
+*e = o ^ o
+*f = n ^ n
+*g = b @ ~none, ~`xHeight - ascender - {overshootLower}` ^ b', b'
+*h = n ^ n
+*i = n ^ n
+*j = i + f @ ~center, ~`descender+{overshootLower}` ^ i
+*k = h + v ^ h
+*l = i ^ i
+*m = n & n ^ n, n
+*n = o ^ o
+*o = n ^ n
+*p = b @ none, ~`xHeight - ascender - {overshootLower}` ^ b, b
+*q = b @ ~none, ~`xHeight - ascender - {overshootLower}` ^ b', b'
+*r = n
+*s = o ^ o
+*t = f @ none, ~{overshootLower} ^ f
+*u = n @ ~0, ~{overshootLower} ^ n', n'
+*v = n ^ n
+*w = v & v ^ v, v
+*x = v ^ v
+*y = v + j ^ v
+*z = f ^ f
+*germandbls = f & s ^ f, s
+*ae = a & e ^ a, e
+*eth = o ^ o
+*oslash = o + slash @ center, none ^ o
+*thorn = p ^ p
+dcroat = d + hyphen ^ d
+hbar = h + hyphen ^ h
+*dotlessi = i ^ i # >>> deleteSmallestContour
+*dotlessj = j ^ j # >>> deleteSmallestContour
+ij = i & j ^ i, j
+lslash = l + hyphen @ center, none ^ l
+*eng = n + j ^ n
+*oe = o & e ^ o, e
+tbar = t + hyphen @ center, none ^ t
+
+# ---------
+# Ligatures
+# ---------
+
+*f_b = f & b ^ f, b
+*f_f = f & f ^ f, f
+*f_h = f & h ^ f, h
+*f_i = f & i ^ f, i
+*f_j = f & j ^ f, j
+*f_k = f & k ^ f, k
+*f_l = f & l ^ f, l
+*f_f_b = f_f & f_b ^ f, b
+*f_f_h = f_f & f_h ^ f, h
+*f_f_i = f_f & f_i ^ f, i
+*f_f_j = f_f & f_j ^ f, j
+*f_f_k = f_f & f_k ^ f, k
+*f_f_l = f_f & f_l ^ f, l
+
+# -----------
+# Punctuation
+# -----------
+
+*period = comma ^ comma
+*comma = period ^ period
+*colon = period + period @ none, xHeight ^ period
+*semicolon = comma + colon ^ colon
+*exclam = period ^ period
+*question = period + two ^ two
+exclamdown = exclam @ ~none, ~none ^ exclam', exclam'
+questiondown = question @ ~none, ~none ^ question', question'
+ellipsis = period & period & period ^ period, period
+*periodcentered = colon ^ colon # >>> deleteBottomContour
+
+*hyphen = t ^ t
+*endash = hyphen ^ hyphen
+*emdash = endash ^ endash
+*bullet = hyphen ^ hyphen
+*underscore = endash @ none, 0 ^ space
+
+*parenleft = bar ^ bar
+parenright = parenleft @ ~none, none ^ parenleft', parenleft'
+*bracketleft = parenleft ^ parenleft
+bracketright = bracketleft @ ~none, none ^ bracketleft', bracketleft'
+*braceleft = bracketleft ^ bracketleft
+braceright = braceleft @ ~none, none ^ braceleft', braceleft'
+
+*bar = slash ^ slash
+*brokenbar = bar + hyphen ^ bar
+*slash = bar ^ bar
+backslash = slash @ ~none, none ^ slash', slash'
+
+*asterisk = exclam ^ exclam
+*dagger = asterisk ^ asterisk
+*daggerdbl = dagger + dagger @ none, ~none ^ dagger
+*asciicircum = v @ none, ~capHeight ^ v
+*asciitilde = hyphen ^ hyphen
+
+# -------------------
+# Letter Like Symbols
+# -------------------
+
+*at = d ^ O
+*ampersand = zero ^ zero
+*section = dollar ^ dollar
+*paragraph = P @ ~none, none ^ P', P'
+*trademark = T & M ^ T, M
+*servicemark = S & trademark ^ S, trademark
+*registered = R + O ^ O
+*copyright = C + O ^ O
+*Pcircle = copyright + P ^ copyright
+
+*ordfeminine = a ^ a
+*ordmasculine = o ^ o
+
+# ------
+# Quotes
+# ------
+
+*quotesingle = exclam ^ exclam
+quotedbl = quotesingle & quotesingle ^ quotesingle, quotesingle
+*quoteleft = comma @ none, capHeight ^ comma
+quoteright = quoteleft @ ~none, ~none ^ quoteleft', quoteleft'
+quotedblleft = quoteleft & quoteleft ^ quoteleft, quoteleft
+quotedblright = quotedblleft @ ~none, ~none ^ quotedblleft', quotedblleft'
+quotesinglbase = quoteright @ none, 0 ^ quoteright
+quotedblbase = quotedblright @ none, 0 ^ quotedblright
+*guilsinglleft = hyphen ^ hyphen
+guilsinglright = guilsinglleft @ ~none, ~none ^ guilsinglleft', guilsinglleft'
+guillemotleft = guilsinglleft & guilsinglleft ^ guilsinglleft, guilsinglleft
+guillemotright = guillemotleft @ ~none, ~none ^ guillemotleft', guillemotleft'
+
+# -------
+# Figures
+# -------
+
+*zero = O & o ^ O, o
+*one = I & l ^ I, l
+*two = S @ ~none, none + L ^ S
+*three = C @ ~none, none ^ C
+*four = one ^ one
+*five = two ^ two
+*six = three ^ three
+*seven = one ^ one
+*eight = three ^ three
+*nine = six @ ~none, ~none ^ six', six'
+
+*dollar = S + bar @ center, none ^ S
+*cent = c + bar @ center, none ^ c
+*sterling = two @ ~none, none ^ two
+*yen = Y + equal @ center, none ^ Y
+*Euro = C + equal ^ C
+*won = W + emdash @ center, none ^ W
+*florin = f ^ f
+
+*numbersign = hyphen + slash ^ slash
+*percent = zero & slash ^ zero, slash
+perthousand = percent & percent ^ percent, percent
+*fraction = percent ^ percent
+
+*minus = hyphen ^ hyphen
+*plus = minus ^ minus
+*plusminus = plus + minus ^ plus
+*multiply = plus ^ plus
+*divide = plus ^ plus
+*equal = minus ^ minus
+notequal = equal + slash ^ equal
+*approxequal = equal ^ equal
+*less = v ^ plus
+greater = less @ ~none, none ^ less', less'
+*lessequal = less + equal ^ equal
+greaterequal = lessequal @ ~none, none ^ lessequal', lessequal'
+
+*degree = o ^ o
+
+# -------
+# Accents
+# -------
+
+*macron = macron ^ macron
+*circumflex = macron ^ macron
+*caron = macron ^ macron
+*grave = macron ^ macron
+*dieresis = macron ^ macron
+*acute = macron ^ macron
+*breve = macron ^ macron
+*dotaccent = macron ^ macron
+*ring = macron ^ macron
+*ogonek = macron ^ macron
+*tilde = macron ^ macron
+*cedilla = acute ^ acute
+*hungarumlaut = cedilla ^ cedilla
+*commaaccent = comma ^ comma
+commaaccent.flipped = commaaccent @ ~none, ~none ^ commaaccent
+acute.ascender = acute ^ acute
+commaaccent.ascender = commaaccent ^ commaaccent
+
+# ------
+# Spaces
+# ------
+
+*uni2009 = space ^ space * 0.45
+*uni00A0 = space
+""".strip()
+
+# don't register defaults until more constructions are in place
+# registerExtensionDefaults({defaultsKey : defaultConstructions})
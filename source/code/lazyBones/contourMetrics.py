@@ -0,0 +1,165 @@
+import numpy
+
+__all__ = """
+ContourMetrics
+""".strip().splitlines()
+
+
+# ------
+# Points
+# ------
+
+class ContourPointsPen:
+
+    """
+    A point pen that collects the coordinates of the
+    on and off curve points of every contour. Contours
+    without points and components are skipped.
+    """
+
+    def __init__(self):
+        self.coordinates = []
+        self.starts = []
+        self.contourIndexes = []
+        self._contourIndex = -1
+
+    def beginPath(self, identifier=None, **kwargs):
+        self._contourIndex += 1
+        self._start = len(self.coordinates)
+
+    def endPath(self):
+        if len(self.coordinates) > self._start:
+            self.starts.append(self._start // 2)
+            self.contourIndexes.append(self._contourIndex)
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs):
+        self.coordinates.extend(pt)
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        pass
+
+
+# -------
+# Metrics
+# -------
+
+class ContourMetrics:
+
+    """
+    The bounds, signed area and centroid of every contour
+    in a glyph, calculated for all contours at once.
+
+    The values are calculated from the polygon of the on
+    and off curve points. The bounds are the bounds of
+    the points and the area and centroid are close to
+    those of the curves, which is enough to compare
+    contours with each other.
+
+    Each row of `bounds`, `area` and `centroid` is for the
+    contour at the same row of `contourIndexes`. Use
+    `removeContour` to remove a contour from the glyph so
+    that the metrics stay in sync with the glyph.
+    """
+
+    def __init__(self, glyph):
+        self.glyph = glyph
+        pen = ContourPointsPen()
+        glyph.drawPoints(pen)
+        self.contourIndexes = numpy.array(pen.contourIndexes, dtype=int)
+        if not pen.starts:
+            self.bounds = numpy.zeros((0, 4))
+            self.area = numpy.zeros(0)
+            self.centroid = numpy.zeros((0, 2))
+            return
+        points = numpy.array(pen.coordinates, dtype=float).reshape(-1, 2)
+        starts = numpy.array(pen.starts, dtype=int)
+        ends = numpy.append(starts[1:], len(points))
+        x = points[:, 0]
+        y = points[:, 1]
+        self.bounds = numpy.column_stack((
+            numpy.minimum.reduceat(x, starts),
+            numpy.minimum.reduceat(y, starts),
+            numpy.maximum.reduceat(x, starts),
+            numpy.maximum.reduceat(y, starts)
+        ))
+        # The next point of the last point
+        # in a contour is its first point.
+        following = numpy.arange(1, len(points) + 1)
+        following[ends - 1] = starts
+        nextX = x[following]
+        nextY = y[following]
+        cross = x * nextY - nextX * y
+        area = numpy.add.reduceat(cross, starts) / 2
+        self.area = area
+        counts = ends - starts
+        centroidX = numpy.add.reduceat(x, starts) / counts
+        centroidY = numpy.add.reduceat(y, starts) / counts
+        hasArea = area != 0
+        if hasArea.any():
+            safeArea = numpy.where(hasArea, area, 1)
+            polygonX = numpy.add.reduceat((x + nextX) * cross, starts) / (6 * safeArea)
+            polygonY = numpy.add.reduceat((y + nextY) * cross, starts) / (6 * safeArea)
+            centroidX = numpy.where(hasArea, polygonX, centroidX)
+            centroidY = numpy.where(hasArea, polygonY, centroidY)
+        self.centroid = numpy.column_stack((centroidX, centroidY))
+
+    def __len__(self):
+        return len(self.contourIndexes)
+
+    # ---------
+    # Selection
+    # ---------
+
+    def _select(self, values, function):
+        if not len(values):
+            return None
+        return int(self.contourIndexes[function(values)])
+
+    def smallest(self):
+        """
+        Get the index of the contour with the
+        smallest area or None.
+        """
+        return self._select(numpy.abs(self.area), numpy.argmin)
+
+    def largest(self):
+        """
+        Get the index of the contour with the
+        largest area or None.
+        """
+        return self._select(numpy.abs(self.area), numpy.argmax)
+
+    def bottom(self):
+        """
+        Get the index of the contour with the
+        lowest bottom or None.
+        """
+        return self._select(self.bounds[:, 1], numpy.argmin)
+
+    def top(self):
+        """
+        Get the index of the contour with the
+        highest top or None.
+        """
+        return self._select(self.bounds[:, 3], numpy.argmax)
+
+    # -------
+    # Editing
+    # -------
+
+    def removeContour(self, index):
+        """
+        Remove the contour at index from the glyph
+        and from the metrics. index may be None.
+        """
+        if index is None:
+            return
+        glyph = self.glyph
+        glyph.removeContour(glyph.contours[index])
+        rows = self.contourIndexes == index
+        keep = ~rows
+        self.contourIndexes = self.contourIndexes[keep]
+        self.contourIndexes[self.contourIndexes > index] -= 1
+        self.bounds = self.bounds[keep]
+        self.area = self.area[keep]
+        self.centroid = self.centroid[keep]
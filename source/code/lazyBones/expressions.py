@@ -0,0 +1,112 @@
+import re
+
+__all__ = """
+ConstructionExpression
+compileExpression
+findExpressions
+getFontMetrics
+""".strip().splitlines()
+
+
+# -----------
+# Expressions
+# -----------
+
+expressionRE = re.compile(r"`([^`]*)`")
+
+class ConstructionExpression:
+
+    """
+    A backtick expression from a construction, such as
+    `` `xHeight - ascender` ``, compiled once so that it
+    can be evaluated for any font without being parsed
+    again. Names in the expression are resolved from the
+    namespace given to `evaluate`.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.code = compile(source.strip(), "<construction expression>", "eval")
+        self.names = frozenset(self.code.co_names)
+
+    def __reduce__(self):
+        # Code objects can't be pickled, so the
+        # expression is compiled again when loaded.
+        return (compileExpression, (self.source,))
+
+    def evaluate(self, namespace):
+        """
+        Evaluate the expression with the names in namespace.
+        This returns None if the expression can't be
+        evaluated with the namespace.
+        """
+        if not self.names.issubset(namespace):
+            return None
+        try:
+            return eval(self.code, {"__builtins__" : {}}, namespace)
+        except (ArithmeticError, TypeError, ValueError):
+            return None
+
+_compiledExpressions = {}
+
+def compileExpression(source):
+    """
+    Get the compiled expression for source. Expressions
+    are shared by every library that contains them. This
+    returns None if source is not a Python expression, in
+    which case it is left for the construction builder.
+    """
+    if source not in _compiledExpressions:
+        try:
+            expression = ConstructionExpression(source)
+        except SyntaxError:
+            expression = None
+        _compiledExpressions[source] = expression
+    return _compiledExpressions[source]
+
+def findExpressions(construction):
+    """
+    Find the backtick expressions in the construction.
+    This returns a tuple of form:
+
+    ```
+    (
+        ("`backtick text`", ConstructionExpression),
+    )
+    ```
+
+    Expressions that can't be compiled are skipped.
+    """
+    expressions = []
+    for match in expressionRE.finditer(construction):
+        expression = compileExpression(match.group(1))
+        if expression is not None:
+            expressions.append((match.group(0), expression))
+    return tuple(expressions)
+
+
+# -------
+# Metrics
+# -------
+
+fontMetricNames = """
+unitsPerEm
+descender
+xHeight
+capHeight
+ascender
+italicAngle
+""".strip().splitlines()
+
+def getFontMetrics(layer):
+    """
+    Get the font info metrics that expressions
+    can refer to for the font of the layer.
+    """
+    info = layer.font.info
+    metrics = {}
+    for name in fontMetricNames:
+        value = getattr(info, name)
+        if value is not None:
+            metrics[name] = value
+    return metrics
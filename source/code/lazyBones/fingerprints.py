@@ -0,0 +1,193 @@
+import hashlib
+from lazyBones.graph import getConstructionReferences
+from lazyBones.variables import getVariableValues
+from lazyBones.expressions import getFontMetrics
+
+__all__ = """
+fingerprintLibKey
+hashGlyph
+hashGlyphDeep
+getConstructionFingerprint
+isGlyphUnchanged
+isGlyphScaffold
+storeFingerprint
+getEditedConstruction
+""".strip().splitlines()
+
+
+fingerprintLibKey = "com.typesupply.LazyBones.fingerprint"
+
+
+# -------
+# Hashing
+# -------
+
+class HashPointPen:
+
+    """
+    A point pen that hashes the points, components
+    and their positions without the identifiers.
+    """
+
+    def __init__(self, hasher):
+        self.hasher = hasher
+
+    def _update(self, *values):
+        self.hasher.update(repr(values).encode("utf-8"))
+
+    def beginPath(self, identifier=None, **kwargs):
+        self._update("beginPath")
+
+    def endPath(self):
+        self._update("endPath")
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs):
+        self._update(pt, segmentType, smooth, name)
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        self._update("component", baseGlyphName, tuple(transformation))
+
+
+def hashGlyph(glyph):
+    """
+    Hash the outline, anchors and metrics of the glyph.
+    """
+    glyph = glyph.naked()
+    hasher = hashlib.sha1()
+    hasher.update(repr((glyph.width, glyph.height)).encode("utf-8"))
+    glyph.drawPoints(HashPointPen(hasher))
+    anchors = [
+        (anchor.name, anchor.x, anchor.y)
+        for anchor in glyph.anchors
+    ]
+    hasher.update(repr(anchors).encode("utf-8"))
+    return hasher.hexdigest()
+
+def hashGlyphDeep(layer, name, glyphHashes=None):
+    """
+    Hash the named glyph in layer with `hashGlyph` and
+    include the hashes of the base glyphs of its
+    components, since components are positioned and
+    decomposed with their outlines. This returns
+    "missing" if the glyph isn't in the layer.
+
+    glyphHashes is an optional dictionary used to cache
+    the `hashGlyph` hashes between calls. Remove a glyph
+    name from it when the glyph changes.
+    """
+    if glyphHashes is None:
+        glyphHashes = {}
+    return _hashGlyphDeep(layer, name, glyphHashes, set())
+
+def _hashGlyphDeep(layer, name, glyphHashes, seen):
+    if name not in layer:
+        return "missing"
+    glyphHash = glyphHashes.get(name)
+    if glyphHash is None:
+        glyphHash = glyphHashes[name] = hashGlyph(layer[name])
+    seen.add(name)
+    baseGlyphs = [
+        component.baseGlyph
+        for component in layer.naked()[name].components
+        if component.baseGlyph not in seen
+    ]
+    if not baseGlyphs:
+        return glyphHash
+    hashes = [glyphHash]
+    for baseGlyph in baseGlyphs:
+        hashes.append(_hashGlyphDeep(layer, baseGlyph, glyphHashes, seen))
+    return hashlib.sha1(" ".join(hashes).encode("utf-8")).hexdigest()
+
+
+# ------------
+# Fingerprints
+# ------------
+
+def getConstructionFingerprint(
+        layer,
+        name,
+        construction,
+        decompose=False,
+        clear=True,
+        glyphHashes=None
+    ):
+    """
+    Get a fingerprint of everything that building the
+    construction for name in layer depends on: the
+    construction, the variables, the font metrics and
+    the glyphs that it references, including the base
+    glyphs of their components.
+
+    glyphHashes is an optional dictionary used to cache
+    the glyph hashes between calls. Remove a glyph name
+    from it when the glyph changes.
+    """
+    if glyphHashes is None:
+        glyphHashes = {}
+    hasher = hashlib.sha1()
+    hasher.update(repr((construction, decompose, clear)).encode("utf-8"))
+    hasher.update(repr(sorted(getVariableValues(layer).items())).encode("utf-8"))
+    hasher.update(repr(sorted(getFontMetrics(layer).items())).encode("utf-8"))
+    for reference in sorted(getConstructionReferences(construction)):
+        # A glyph built from itself is covered
+        # by the check of the built result.
+        if reference == name:
+            continue
+        glyphHash = hashGlyphDeep(layer, reference, glyphHashes)
+        hasher.update(f"{reference}:{glyphHash}".encode("utf-8"))
+    return hasher.hexdigest()
+
+def isGlyphUnchanged(glyph, fingerprint):
+    """
+    Return True if the glyph was built from the same
+    fingerprint and has not been changed since.
+    """
+    data = glyph.lib.get(fingerprintLibKey)
+    if not data:
+        return False
+    if data.get("source") != fingerprint:
+        return False
+    return data.get("result") == hashGlyph(glyph)
+
+def isGlyphScaffold(glyph):
+    """
+    Return True if the glyph was built by Lazy Bones
+    and has not been changed since, regardless of
+    whether what it was built from has changed.
+    """
+    data = glyph.lib.get(fingerprintLibKey)
+    if not data:
+        return False
+    return data.get("result") == hashGlyph(glyph)
+
+def storeFingerprint(glyph, fingerprint, construction=None, decompose=False, clear=True, edited=False):
+    """
+    Store the fingerprint and the hash of the built
+    glyph in the glyph lib with the construction it
+    was built from. edited is True when the construction
+    is not the one in the library for the glyph.
+    """
+    glyph.lib[fingerprintLibKey] = dict(
+        source=fingerprint,
+        result=hashGlyph(glyph),
+        construction=construction,
+        decompose=decompose,
+        clear=clear,
+        edited=edited
+    )
+
+def getEditedConstruction(glyph):
+    """
+    Get the construction that the glyph was built from
+    if it is not the one in the library. This returns
+    a dictionary with construction, decompose and clear
+    keys or None.
+    """
+    data = glyph.lib.get(fingerprintLibKey)
+    if not data or not data.get("edited") or data.get("construction") is None:
+        return None
+    return dict(
+        construction=data["construction"],
+        decompose=data.get("decompose", False),
+        clear=data.get("clear", True)
+    )
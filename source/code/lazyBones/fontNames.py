@@ -0,0 +1,22 @@
+__all__ = """
+getFontName
+""".strip().splitlines()
+
+
+def getFontName(font, untitledNumber=1):
+    """
+    Get a name for the font to show in reports: its
+    path, its family and style names if it hasn't
+    been saved or "Untitled" with untitledNumber
+    if it has neither.
+    """
+    if font.path is not None:
+        return font.path
+    fontName = " ".join([
+        name
+        for name in (font.info.familyName, font.info.styleName)
+        if name
+    ])
+    if not fontName:
+        fontName = f"Untitled {untitledNumber}"
+    return fontName
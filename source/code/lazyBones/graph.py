@@ -0,0 +1,198 @@
+import re
+from functools import lru_cache
+
+__all__ = """
+getConstructionReferences
+ConstructionGraph
+""".strip().splitlines()
+
+
+# ----------
+# References
+# ----------
+
+glyphNameRE = re.compile(r"[A-Za-z_.][A-Za-z0-9_.\-]*")
+expressionRE = re.compile(r"`[^`]*`")
+
+def getConstructionReferences(construction):
+    """
+    Get the names of the glyphs referenced by the given
+    construction. This includes components, ligature parts
+    and the glyphs used for the metrics. Flipped references
+    such as `b'` are returned without the quote.
+
+    The construction must not include the `name =` part.
+    """
+    return list(_getConstructionReferences(construction))
+
+# The same construction text is usually found in many
+# layers and fonts, so the references are cached.
+
+@lru_cache(maxsize=4096)
+def _getConstructionReferences(construction):
+    construction = construction.split("#", 1)[0]
+    construction = construction.split("|", 1)[0]
+    construction = expressionRE.sub("0", construction)
+    metrics = ""
+    if "^" in construction:
+        construction, metrics = construction.split("^", 1)
+    references = []
+    for part in construction.split("&"):
+        for component in part.split("+"):
+            component = component.split("@", 1)[0].strip().rstrip("'")
+            if glyphNameRE.fullmatch(component) and component not in references:
+                references.append(component)
+    for metric in metrics.split(","):
+        match = glyphNameRE.match(metric.strip())
+        if match is None:
+            continue
+        reference = match.group(0)
+        if reference not in references:
+            references.append(reference)
+    return tuple(references)
+
+
+# -----
+# Graph
+# -----
+
+class ConstructionGraph:
+
+    """
+    A dependency graph of constructions.
+
+    `constructions` is a dictionary of the form returned by
+    `loadConstructions`. Glyphs that reference themselves,
+    such as `macron = macron ^ macron`, are built from their
+    own current outline, so those references are not treated
+    as dependencies.
+    """
+
+    def __init__(self, constructions):
+        self.dependencies = {}
+        self._dependents = None
+        for name, data in constructions.items():
+            references = _getConstructionReferences(data.construction)
+            self.dependencies[name] = tuple(
+                reference
+                for reference in references
+                if reference != name
+            )
+
+    def getDependencies(self, name):
+        """
+        Get the names of the glyphs that the
+        construction for name references.
+        """
+        return self.dependencies.get(name, ())
+
+    def getDependents(self, name):
+        """
+        Get the names of the glyphs whose
+        constructions reference name.
+        """
+        if self._dependents is None:
+            dependents = {}
+            for dependent, dependencies in self.dependencies.items():
+                for dependency in dependencies:
+                    dependents.setdefault(dependency, set()).add(dependent)
+            self._dependents = dependents
+        return self._dependents.get(name, set())
+
+    def getAffected(self, names):
+        """
+        Get the names of the glyphs that depend on any of
+        the given names directly or through other glyphs.
+        The given names are only included if they depend
+        on one of the others.
+        """
+        affected = set()
+        work = list(names)
+        while work:
+            name = work.pop()
+            for dependent in self.getDependents(name):
+                if dependent not in affected:
+                    affected.add(dependent)
+                    work.append(dependent)
+        return affected
+
+    def getBuildOrder(self, names):
+        """
+        Sort the given names so that each glyph is built
+        after the glyphs it depends on. Only dependencies
+        within names are considered. This returns a tuple
+        of form:
+
+        ```
+        (
+            [ordered glyph names],
+            [cycle glyph names lists]
+        )
+        ```
+
+        Glyphs that depend on each other, such as `period`
+        and `comma`, can't be ordered. They are listed
+        alphabetically in the order and reported as a cycle.
+        """
+        names = set(names)
+        order = []
+        cycles = []
+        for component in self._getStronglyConnectedComponents(names):
+            if len(component) > 1:
+                component = sorted(component)
+                cycles.append(component)
+            order.extend(component)
+        return order, cycles
+
+    def _getStronglyConnectedComponents(self, names):
+        # Iterative Tarjan. Components are yielded after
+        # every component they depend on.
+        index = {}
+        lowLink = {}
+        stack = []
+        onStack = set()
+        counter = 0
+        for root in sorted(names):
+            if root in index:
+                continue
+            work = [(root, iter(self._getSortedDependencies(root, names)))]
+            index[root] = lowLink[root] = counter
+            counter += 1
+            stack.append(root)
+            onStack.add(root)
+            while work:
+                name, dependencies = work[-1]
+                advanced = False
+                for dependency in dependencies:
+                    if dependency not in index:
+                        index[dependency] = lowLink[dependency] = counter
+                        counter += 1
+                        stack.append(dependency)
+                        onStack.add(dependency)
+                        work.append((dependency, iter(self._getSortedDependencies(dependency, names))))
+                        advanced = True
+                        break
+                    elif dependency in onStack:
+                        lowLink[name] = min(lowLink[name], index[dependency])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowLink[parent] = min(lowLink[parent], lowLink[name])
+                if lowLink[name] == index[name]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        onStack.discard(member)
+                        component.append(member)
+                        if member == name:
+                            break
+                    yield component
+
+    def _getSortedDependencies(self, name, names):
+        return sorted(
+            dependency
+            for dependency in self.getDependencies(name)
+            if dependency in names
+        )
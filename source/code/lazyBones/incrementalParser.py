@@ -0,0 +1,305 @@
+from glyphConstruction import ParseGlyphConstructionListFromString
+from lazyBones.constructions import Construction, variablePlaceholderTemplate, parseConstructionLine
+from lazyBones.variables import getVariableNames
+from lazyBones.expressions import expressionRE, compileExpression
+from lazyBones.graph import ConstructionGraph
+
+__all__ = """
+IncrementalConstructionParser
+""".strip().splitlines()
+
+
+# -----
+# Lines
+# -----
+
+class ParsedLine:
+
+    """
+    The result of parsing one line of construction text.
+    kind is "empty", "variable", "construction" or "error".
+    """
+
+    __slots__ = ("text", "kind", "name", "value", "error")
+
+    def __init__(self, text, kind="empty", name=None, value=None, error=None):
+        self.text = text
+        self.kind = kind
+        self.name = name
+        self.value = value
+        self.error = error
+
+
+# ------
+# Parser
+# ------
+
+class IncrementalConstructionParser:
+
+    """
+    Parse construction text one line at a time so that an
+    edit only parses the lines that changed.
+
+    `constructions` is a dictionary of the constructions
+    in the text, with the last definition of a name
+    winning as it does when the text is loaded. It is
+    updated in place after every edit, as are the lines
+    with errors and the names defined more than once.
+    Call `getDiagnostics` for the problems in the text.
+
+    Variable definitions such as `$width = 100` apply to
+    the lines after them, so when one changes every line
+    after it is parsed again.
+    """
+
+    def __init__(self, text="", variableNames=None):
+        if variableNames is None:
+            variableNames = getVariableNames()
+        self.placeholders = {
+            variableName : variablePlaceholderTemplate.format(name=variableName)
+            for variableName in variableNames
+        }
+        self._header = [
+            f"${variableName} = {placeholder}"
+            for variableName, placeholder in self.placeholders.items()
+        ]
+        self.lines = []
+        self.parsedLines = []
+        self.constructions = {}
+        self._definitions = {}
+        self._variableCount = 0
+        self._errorLines = set()
+        self._redefinedNames = set()
+        self._cycles = None
+        self._baseConstructions = None
+        self._baseCycles = []
+        self.setText(text)
+
+    # -------
+    # Editing
+    # -------
+
+    def setText(self, text):
+        """
+        Set the text. Only the lines between the lines
+        that are the same at the start and the end of
+        the old and new text are parsed. This returns
+        the range of new line indexes that were parsed.
+        """
+        oldLines = self.lines
+        newLines = text.split("\n")
+        limit = min(len(oldLines), len(newLines))
+        start = 0
+        while start < limit and oldLines[start] == newLines[start]:
+            start += 1
+        end = 0
+        while end < limit - start and oldLines[-1 - end] == newLines[-1 - end]:
+            end += 1
+        return self.replaceLines(
+            start,
+            len(oldLines) - end,
+            newLines[start:len(newLines) - end]
+        )
+
+    def replaceLines(self, start, end, lines):
+        """
+        Replace the lines from start up to end with
+        lines and parse them. This returns the range
+        of new line indexes that were parsed.
+        """
+        removed = self.parsedLines[start:end]
+        variableChanged = any(line.kind == "variable" for line in removed)
+        variableChanged |= any(line.lstrip().startswith("$") for line in lines)
+        for parsedLine in removed:
+            self._removeLine(parsedLine)
+        self.lines[start:end] = lines
+        self.parsedLines[start:end] = [None] * len(lines)
+        end = start + len(lines)
+        if variableChanged:
+            # The lines after a variable definition
+            # depend on it, so they are parsed again.
+            for parsedLine in self.parsedLines[end:]:
+                self._removeLine(parsedLine)
+            end = len(self.lines)
+        variables = self._getVariablesBefore(start)
+        for index in range(start, end):
+            parsedLine = self._parseLine(self.lines[index], variables)
+            if parsedLine.kind == "variable":
+                variables[parsedLine.name] = parsedLine.value
+            self.parsedLines[index] = parsedLine
+            self._addLine(parsedLine)
+        return start, end
+
+    def _getVariablesBefore(self, index):
+        variables = {}
+        if self._variableCount:
+            for parsedLine in self.parsedLines[:index]:
+                if parsedLine.kind == "variable":
+                    variables[parsedLine.name] = parsedLine.value
+        return variables
+
+    # -------
+    # Parsing
+    # -------
+
+    def _parseLine(self, text, variables):
+        stripped = text.strip()
+        if not stripped or stripped.startswith("#"):
+            return ParsedLine(text)
+        if stripped.startswith("$"):
+            if "=" not in stripped:
+                return ParsedLine(text, "error", error="Variable definitions need a value.")
+            name, value = stripped[1:].split("=", 1)
+            return ParsedLine(text, "variable", name=name.strip(), value=value.strip())
+        header = self._header + [
+            f"${variableName} = {value}"
+            for variableName, value in variables.items()
+        ]
+        try:
+            parsed = ParseGlyphConstructionListFromString("\n".join(header + [text]))
+        except KeyError as error:
+            return ParsedLine(text, "error", error=f"Unknown variable {error.args[0]}.")
+        except Exception as error:
+            return ParsedLine(text, "error", error=str(error) or type(error).__name__)
+        parsed = [construction for construction in parsed if construction]
+        if not parsed:
+            return ParsedLine(text)
+        name, construction, decompose = parseConstructionLine(parsed[0])
+        if name is None:
+            return ParsedLine(text, "error", error="Missing glyph name.")
+        if not construction:
+            return ParsedLine(text, "error", error="Missing construction.")
+        for match in expressionRE.finditer(construction):
+            if compileExpression(match.group(1)) is None:
+                return ParsedLine(text, "error", error=f"Invalid expression {match.group(0)}.")
+        record = Construction(name, construction, decompose=decompose)
+        return ParsedLine(text, "construction", name=name, value=record)
+
+    # -----------
+    # Definitions
+    # -----------
+
+    def _addLine(self, parsedLine):
+        if parsedLine.kind == "variable":
+            self._variableCount += 1
+        elif parsedLine.kind == "error":
+            self._errorLines.add(parsedLine)
+        elif parsedLine.kind == "construction":
+            definitions = self._definitions.setdefault(parsedLine.name, [])
+            definitions.append(parsedLine)
+            self._updateConstruction(parsedLine.name)
+
+    def _removeLine(self, parsedLine):
+        if parsedLine.kind == "variable":
+            self._variableCount -= 1
+        elif parsedLine.kind == "error":
+            self._errorLines.discard(parsedLine)
+        elif parsedLine.kind == "construction":
+            definitions = self._definitions[parsedLine.name]
+            definitions.remove(parsedLine)
+            self._updateConstruction(parsedLine.name)
+
+    def _updateConstruction(self, name):
+        definitions = self._definitions.get(name)
+        previous = self.constructions.get(name)
+        if not definitions:
+            self._definitions.pop(name, None)
+            self.constructions.pop(name, None)
+            self._redefinedNames.discard(name)
+            self._cycles = None
+            return
+        winner = definitions[0]
+        if len(definitions) > 1:
+            # Names are rarely defined more than once,
+            # so the line positions are only looked
+            # up when they are.
+            winner = max(definitions, key=self._getLineIndex)
+            self._redefinedNames.add(name)
+        else:
+            self._redefinedNames.discard(name)
+        self.constructions[name] = winner.value
+        if winner.value != previous:
+            # The cycles are only found again
+            # when a construction changes.
+            self._cycles = None
+
+    def _getLineIndex(self, parsedLine):
+        for index, other in enumerate(self.parsedLines):
+            if other is parsedLine:
+                return index
+        return -1
+
+    # -----------
+    # Diagnostics
+    # -----------
+
+    def getDiagnostics(self, baseConstructions=None):
+        """
+        Get the problems in the text. baseConstructions
+        may be a dictionary of constructions that the text
+        is added to, such as the default constructions, so
+        that dependency cycles through them are found. This
+        returns a list of tuples of form:
+
+        ```
+        (line index, "message")
+        ```
+
+        sorted by line index.
+        """
+        cycles = self.getCycles(baseConstructions)
+        if not self._errorLines and not self._redefinedNames and not cycles:
+            return []
+        # Line indexes change with every edit above
+        # them, so they are looked up in one pass.
+        lineIndexes = {
+            parsedLine : index
+            for index, parsedLine in enumerate(self.parsedLines)
+        }
+        diagnostics = [
+            (lineIndexes[parsedLine], parsedLine.error)
+            for parsedLine in self._errorLines
+        ]
+        for name in self._redefinedNames:
+            indexes = sorted(lineIndexes[parsedLine] for parsedLine in self._definitions[name])
+            for index in indexes[:-1]:
+                diagnostics.append((index, f"{name} is defined again on line {indexes[-1] + 1}."))
+        for cycle in cycles:
+            text = ", ".join(cycle)
+            for name in cycle:
+                if name in self._definitions:
+                    index = max(lineIndexes[parsedLine] for parsedLine in self._definitions[name])
+                    diagnostics.append((index, f"{name} depends on itself through {text}."))
+        diagnostics.sort(key=lambda diagnostic: diagnostic[0])
+        return diagnostics
+
+    def getCycles(self, baseConstructions=None):
+        """
+        Get the lists of glyph names that depend on each
+        other because of the text. Cycles that are in
+        baseConstructions on their own, such as `n` and `o`
+        in the default constructions, are left out even
+        if the text defines one of their glyphs again.
+        """
+        if baseConstructions is not self._baseConstructions:
+            self._baseConstructions = baseConstructions
+            self._baseCycles = []
+            if baseConstructions:
+                graph = ConstructionGraph(baseConstructions)
+                order, cycles = graph.getBuildOrder(baseConstructions.keys())
+                self._baseCycles = [set(cycle) for cycle in cycles]
+            self._cycles = None
+        if self._cycles is None:
+            constructions = {}
+            if baseConstructions is not None:
+                constructions.update(baseConstructions)
+            constructions.update(self.constructions)
+            graph = ConstructionGraph(constructions)
+            order, cycles = graph.getBuildOrder(constructions.keys())
+            self._cycles = [
+                cycle
+                for cycle in cycles
+                if any(name in self.constructions for name in cycle)
+                and not any(baseCycle.issuperset(cycle) for baseCycle in self._baseCycles)
+            ]
+        return self._cycles
@@ -0,0 +1,661 @@
+import time
+import weakref
+from contextlib import nullcontext
+import vanilla
+import ezui
+from mojo.UI import CurrentFontWindow, CurrentGlyphWindow, StatusInteractivePopUpWindow
+from mojo.roboFont import AllFonts, CurrentFont, CurrentGlyph
+from mojo.extensions import registerExtensionDefaults, setExtensionDefault, getExtensionDefault
+from PyObjCTools.AppHelper import callLater
+from lazyBones.constructions import (
+    guessConstructionForGlyphName,
+    buildGlyphFromConstruction,
+    iterBuildConstructionsInLayers,
+    ConstructionsLoader,
+    BatchBuild,
+    defaultsKey,
+    defaultConstructions,
+    compileConstructions,
+    getUserConstructions,
+    setUserConstructions
+)
+from lazyBones.incrementalParser import IncrementalConstructionParser
+from lazyBones.parallel import ParallelBuild
+from lazyBones.scheduler import BuildScheduler
+from lazyBones.layerIndex import LayerGlyphIndex
+from lazyBones.profiling import BuildProfiler
+from lazyBones.validation import findMissingSources, validateLayers, formatMissingSources
+
+# -----
+# Glyph
+# -----
+
+def showConstructionForCurrentGlyph():
+    """
+    Show the construction editor for the current glyph.
+    """
+    glyph = CurrentGlyph()
+    if glyph is None:
+        return
+    data = guessConstructionForGlyphName(glyph.name, glyph.layer)
+    if data is not None:
+        construction = data.construction
+        decompose = data.decompose
+        clear = data.clear
+        LazyBonesGlyphEditorController(
+            glyph,
+            construction=construction,
+            decompose=decompose,
+            clear=clear
+        )
+    else:
+        vanilla.dialogs.message(
+            "No construction available for %s." % glyph.name,
+            "Define one in the preferences so that you can be lazy in the future."
+        )
+
+class LazyBonesGlyphEditorController(ezui.WindowController):
+
+    def build(self,
+            glyph=None,
+            construction=None,
+            decompose=True,
+            clear=True
+        ):
+        self.glyph = glyph
+        content = """
+        [__] @constructionField
+
+        [ ] Clear Outline @clearCheckbox
+        [ ] Decompose Components @decomposeCheckbox
+
+        =---=
+
+        (Cancel) @cancelButton
+        (Build) @buildButton
+        """
+        buttonWidth = 80
+        descriptionData = dict(
+            constructionField=dict(
+                value=construction
+            ),
+            clearCheckbox=dict(
+                value=clear
+            ),
+            decomposeCheckbox=dict(
+                value=decompose
+            ),
+            cancelButton=dict(
+                width=buttonWidth,
+                keyEquivalent=".",
+                keyEquivalentModifiers=["command"]
+            ),
+            buildButton=dict(
+                width=buttonWidth
+            )
+        )
+        self.w = ezui.EZPopUp(
+            content=content,
+            descriptionData=descriptionData,
+            controller=self,
+            parent=CurrentGlyphWindow().getGlyphView(),
+            size=(350, "auto"),
+            defaultButton="buildButton"
+        )
+
+    def started(self):
+        self.w.open()
+
+    def cancelButtonCallback(self, sender):
+        self.w.close()
+
+    def buildButtonCallback(self, sender):
+        construction = self.w.getItemValue("constructionField")
+        clear = self.w.getItemValue("clearCheckbox")
+        decompose = self.w.getItemValue("decomposeCheckbox")
+        buildGlyphFromConstruction(
+            self.glyph,
+            construction=construction,
+            clear=clear,
+            decompose=decompose
+        )
+        self.w.close()
+
+
+# ----
+# Font
+# ----
+
+def showConstructionsForCurrentFont():
+    """
+    Show the construction editor for the current font.
+    """
+    font = CurrentFont()
+    if font is None:
+        return
+    LazyBonesFontSheet(font)
+
+constructionTableCaptionTemplate = "glyphs selected for construction."
+
+# Set this default to True to print a timing
+# report for every build to the output window.
+profileDefaultsKey = "com.typesupply.LazyBones.profile"
+
+class LazyBonesFontSheet(ezui.WindowController):
+
+    def build(self,
+            font=None
+        ):
+        self.font = font
+        self.originalConstructions = ConstructionsLoader(font.defaultLayer).constructions
+        self.constructionNames = sorted(self.originalConstructions.keys())
+        self.constructionRows = {}
+        self.glyphIndex = LayerGlyphIndex(font.defaultLayer)
+        self.scheduler = None
+        self.parallelBuild = None
+        self.openBatches = []
+        content = f"""
+        |---| @constructionTable
+        !- 0 {constructionTableCaptionTemplate} @constructionTableCaption
+        =---=
+        [ ] Show Existing Glyphs @showExistingGlyphsCheckbox
+        [ ] Build In All Layers @allLayersCheckbox
+        (Build In Current Font) @buildButton
+        (Build In All Fonts) @buildInAllFontsButton
+        (Cancel) @cancelButton
+        """
+        buttonWidth = 150
+        descriptionData = dict(
+            constructionTable=dict(
+                columnDescriptions = [
+                    dict(
+                        title="Name",
+                        identifier="name",
+                        editable=False,
+                        width=100
+                    ),
+                    dict(
+                        title="Construction",
+                        identifier="construction",
+                        editable=True
+                    ),
+                    dict(
+                        title="Decompose",
+                        identifier="decompose",
+                        editable=True,
+                        cellDescription=dict(
+                            cellType="Checkbox"
+                        ),
+                        width=80
+                    ),
+                    dict(
+                        title="Clear",
+                        identifier="clear",
+                        editable=True,
+                        cellDescription=dict(
+                            cellType="Checkbox"
+                        ),
+                        width=80
+                    ),
+                    dict(
+                        title="Missing",
+                        identifier="missing",
+                        editable=False,
+                        width=100
+                    )
+                ]
+            ),
+            constructionTableCaption=dict(
+                alignment="center",
+                width="fill"
+            ),
+            showExistingGlyphsCheckbox=dict(
+                gravity="leading"
+            ),
+            allLayersCheckbox=dict(
+                gravity="leading"
+            ),
+            cancelButton=dict(
+                keyEquivalent=".",
+                keyEquivalentModifiers=["command"]
+            ),
+            buildButton=dict(
+                width=buttonWidth
+            ),
+            buildInAllFontsButton=dict(
+                width=buttonWidth
+            )
+        )
+        self.w = ezui.EZSheet(
+            content=content,
+            descriptionData=descriptionData,
+            controller=self,
+            parent=CurrentFontWindow().w,
+            size=(700, 300),
+            defaultButton="buildButton"
+        )
+        self.populateconstructionTable()
+
+    def started(self):
+        self.w.open()
+
+    def destroy(self):
+        if self.scheduler is not None:
+            self.scheduler.cancel()
+        if self.parallelBuild is not None:
+            self.parallelBuild.close()
+        self.glyphIndex.close()
+
+    def showExistingGlyphsCheckboxCallback(self, sender):
+        self.populateconstructionTable()
+
+    def cancelButtonCallback(self, sender):
+        if self.scheduler is not None:
+            self.scheduler.cancel()
+            self._buildFinished()
+        else:
+            self.w.close()
+
+    def buildButtonCallback(self, sender):
+        fonts = [self.font]
+        self._build(fonts)
+
+    def buildInAllFontsButtonCallback(self, sender):
+        fonts = AllFonts()
+        self._build(fonts, parallel=True)
+
+    def populateconstructionTable(self):
+        names = self.constructionNames
+        if not self.w.getItemValue("showExistingGlyphsCheckbox"):
+            existing = self.glyphIndex.nonEmptyGlyphNames
+            names = [
+                name
+                for name in names
+                if name not in existing
+            ]
+        constructions = [
+            self._getConstructionRow(name)
+            for name in names
+        ]
+        # The missing sources are the glyphs that aren't in
+        # the font and can't be built by any construction.
+        missing = findMissingSources(
+            {row["name"] : row for row in constructions},
+            self.glyphIndex.glyphNames,
+            builtConstructions=self.originalConstructions
+        )
+        for row in constructions:
+            row["missing"] = " ".join(missing.get(row["name"], ()))
+        self.w.setItemValue("constructionTable", constructions)
+
+    def _getConstructionRow(self, name):
+        # The table edits its rows, so it gets dictionaries
+        # made from the shared records. Rows are made once
+        # and reused when the table is filtered again.
+        row = self.constructionRows.get(name)
+        if row is None:
+            row = dict(self.originalConstructions[name])
+            self.constructionRows[name] = row
+        return row
+
+    def constructionTableSelectionCallback(self, sender):
+        count = len(sender.getSelectedIndexes())
+        t = constructionTableCaptionTemplate
+        if count == 1:
+            t = t.replace("glyphs", "glyph")
+        self.w.setItemValue(
+            "constructionTableCaption",
+            str(count) + " " + t
+        )
+
+    # --------
+    # Building
+    # --------
+
+    # The build runs in short slices on the run loop so
+    # that RoboFont stays responsive and the build can be
+    # cancelled. The progress bar is updated once per
+    # slice rather than once per glyph.
+
+    def _build(self, fonts, parallel=False):
+        if self.scheduler is not None:
+            return
+        constructionTable = self.w.getItem("constructionTable")
+        selectedConstructions = constructionTable.getSelectedItems()
+        if not selectedConstructions:
+            self.w.close()
+            return
+        selectedConstructions = {
+            item["name"] : item
+            for item in selectedConstructions
+        }
+        modifiedConstructions = {}
+        for name, item in selectedConstructions.items():
+            og = self.originalConstructions[name]
+            construction = og.replace(
+                construction=item["construction"],
+                decompose=item["decompose"],
+                clear=item["clear"]
+            )
+            if construction is not og:
+                modifiedConstructions[name] = construction
+        allLayers = self.w.getItemValue("allLayersCheckbox")
+        layers = []
+        for font in fonts:
+            if allLayers:
+                layers.extend(font.layers)
+            else:
+                layers.append(font.defaultLayer)
+        glyphNames = list(selectedConstructions.keys())
+        problems = validateLayers(layers, glyphNames, modifiedConstructions)
+        if problems:
+
+            def resultCallback(result):
+                if result:
+                    self._startBuild(fonts, glyphNames, modifiedConstructions, parallel, allLayers)
+
+            vanilla.dialogs.askYesNo(
+                messageText="Some constructions use glyphs that don't exist or depend on each other. Build anyway?",
+                informativeText=formatMissingSources(problems),
+                parentWindow=self.w,
+                resultCallback=resultCallback
+            )
+        else:
+            self._startBuild(fonts, glyphNames, modifiedConstructions, parallel, allLayers)
+
+    def _startBuild(self, fonts, glyphNames, modifiedConstructions, parallel, allLayers):
+        if allLayers:
+            layerCount = sum(len(font.layerOrder) for font in fonts)
+        else:
+            layerCount = len(fonts)
+        self.progressBar = self.startProgress(
+            text="Building...",
+            maxValue=len(glyphNames) * layerCount,
+            parent=self.w
+        )
+        self.progressText = None
+        self.progressCount = 0
+        self.profiler = None
+        if getExtensionDefault(profileDefaultsKey, False):
+            self.profiler = BuildProfiler()
+        for identifier in ("buildButton", "buildInAllFontsButton"):
+            self.w.getItem(identifier).enable(False)
+        jobs = []
+        self.openBatches = []
+        serialFonts = fonts
+        if parallel:
+            serialFonts = self._startParallelBuild(
+                fonts,
+                glyphNames,
+                modifiedConstructions,
+                allLayers
+            )
+        for font in serialFonts:
+            if allLayers:
+                layers = font.layers
+            else:
+                layers = [font.defaultLayer]
+            job = iterBuildConstructionsInLayers(
+                layers,
+                glyphNames,
+                modifiedConstructions=modifiedConstructions,
+                progressCallback=self._buildProgressCallback,
+                skipUnchanged=True,
+                openBatches=self.openBatches
+            )
+            jobs.append(job)
+        # The serial fonts are built while
+        # the workers build the others.
+        if self.parallelBuild is not None:
+            jobs.append(self._iterParallelResults())
+        self.scheduler = BuildScheduler(jobs)
+        callLater(0, self._buildSlice)
+
+    def _buildProgressCallback(self, name):
+        self.progressText = f"Building {name}..."
+        self.progressCount += 1
+
+    def _buildSlice(self):
+        if self.scheduler is None:
+            return
+        done = True
+        try:
+            with self._profiling():
+                try:
+                    done = self.scheduler.runSlice()
+                finally:
+                    # The batches are finished before returning
+                    # to the run loop, so that windows show the
+                    # glyphs built so far and anything the user
+                    # does between slices gets its own undo.
+                    for batch in self.openBatches:
+                        batch.finish()
+        finally:
+            if self.progressCount:
+                self.progressBar.increment(self.progressCount)
+                self.progressCount = 0
+            if self.progressText is not None:
+                self.progressBar.setText(self.progressText)
+                self.progressText = None
+            if done:
+                self._buildFinished()
+        if not done:
+            callLater(0, self._buildSlice)
+
+    def _buildFinished(self):
+        # Jobs that were cancelled before they started
+        # never ran their cleanup, so the workers are
+        # shut down here as well.
+        with self._profiling():
+            self.scheduler.cancel()
+        if self.parallelBuild is not None:
+            self.parallelBuild.close()
+            self.parallelBuild = None
+        self.scheduler = None
+        self.progressBar.close()
+        self.progressBar = None
+        if self.profiler is not None:
+            print(self.profiler.formatReport())
+            self.profiler = None
+        self.w.close()
+
+    def _profiling(self):
+        # The profiler is only active while a slice runs so
+        # that it doesn't record work done between slices.
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler
+
+    def _startParallelBuild(self, fonts, glyphNames, modifiedConstructions, allLayers):
+        """
+        Start building the fonts that are saved on disk in
+        worker processes. Fonts that have no path or unsaved
+        changes can't be built from disk, so they are returned
+        for building in this process.
+        """
+        self.parallelFonts = {}
+        serialFonts = []
+        for font in fonts:
+            if font.path is None or font.naked().dirty:
+                serialFonts.append(font)
+            else:
+                self.parallelFonts[font.path] = font
+        if self.parallelFonts:
+            self.parallelBuild = ParallelBuild(
+                self.parallelFonts.keys(),
+                glyphNames,
+                modifiedConstructions=modifiedConstructions,
+                progressCallback=self._parallelProgressCallback,
+                skipUnchanged=True,
+                allLayers=allLayers
+            )
+            self.parallelBuild.start()
+        return serialFonts
+
+    def _parallelProgressCallback(self, path, name):
+        self._buildProgressCallback(name)
+
+    def _iterParallelResults(self):
+        """
+        Apply the results of the workers to the open fonts
+        as they arrive. Each font is applied in one step.
+        Fonts whose worker failed are built in this
+        process once the others are done.
+        """
+        build = self.parallelBuild
+        while not build.done:
+            for path, glyphs in build.poll(timeout=0.01):
+                font = self.parallelFonts[path]
+                with BatchBuild(font) as batch:
+                    for layerName, name, glif in glyphs:
+                        layer = font.getLayer(layerName)
+                        glyph = batch.getGlyph(layer, name)
+                        glyph.clear()
+                        glyph.loadFromGLIF(glif)
+                        batch.glyphChanged(glyph)
+            yield
+        for path in build.failedPaths:
+            font = self.parallelFonts[path]
+            if build.allLayers:
+                layers = font.layers
+            else:
+                layers = [font.defaultLayer]
+            yield from iterBuildConstructionsInLayers(
+                layers,
+                build.glyphNames,
+                modifiedConstructions=build.modifiedConstructions,
+                progressCallback=self._buildProgressCallback,
+                skipUnchanged=True,
+                openBatches=self.openBatches
+            )
+
+# --------
+# Defaults
+# --------
+
+def showConstructionDefaults():
+    """
+    Show the editor for the user constructions.
+    """
+    LazyBonesConstructionsEditor()
+
+constructionsEditorValidationDelay = 0.3
+
+class LazyBonesConstructionsEditor(ezui.WindowController):
+
+    """
+    An editor for the constructions that are added to the
+    default constructions. Every edit is parsed right
+    away, but only the lines that changed are parsed.
+    Problems are listed once typing has paused.
+    """
+
+    def build(self):
+        text = getUserConstructions()
+        self.parser = IncrementalConstructionParser(text)
+        # The defaults are already compiled for building,
+        # so the compiled records are used as they are.
+        library = compileConstructions(defaultConstructions)
+        self.defaultConstructions = library.getUnresolvedConstructions()
+        self.diagnostics = None
+        self.validationDeadline = None
+        self.validationScheduled = False
+        self.closed = False
+        content = """
+        [[_ _]] @constructionsEditor
+
+        |---| @diagnosticsTable
+
+        =---=
+
+        (Cancel) @cancelButton
+        (Save) @saveButton
+        """
+        buttonWidth = 80
+        descriptionData = dict(
+            constructionsEditor=dict(
+                value=text,
+                height=300
+            ),
+            diagnosticsTable=dict(
+                columnDescriptions=[
+                    dict(
+                        title="Line",
+                        identifier="line",
+                        width=50
+                    ),
+                    dict(
+                        title="Problem",
+                        identifier="message"
+                    )
+                ],
+                height=100
+            ),
+            cancelButton=dict(
+                width=buttonWidth,
+                keyEquivalent=".",
+                keyEquivalentModifiers=["command"]
+            ),
+            saveButton=dict(
+                width=buttonWidth
+            )
+        )
+        self.w = ezui.EZWindow(
+            title="Lazy Bones Constructions",
+            content=content,
+            descriptionData=descriptionData,
+            controller=self,
+            size=(600, "auto")
+        )
+        self.validate()
+
+    def started(self):
+        self.w.open()
+
+    def destroy(self):
+        self.closed = True
+
+    def constructionsEditorCallback(self, sender):
+        self.parser.setText(sender.get())
+        self.validationDeadline = time.perf_counter() + constructionsEditorValidationDelay
+        if not self.validationScheduled:
+            self.validationScheduled = True
+            callLater(constructionsEditorValidationDelay, self._validationCallback)
+
+    def _validationCallback(self):
+        self.validationScheduled = False
+        if self.closed or self.validationDeadline is None:
+            return
+        remaining = self.validationDeadline - time.perf_counter()
+        if remaining > 0:
+            self.validationScheduled = True
+            callLater(remaining, self._validationCallback)
+        else:
+            self.validate()
+
+    def validate(self):
+        """
+        List the problems in the text.
+        """
+        self.validationDeadline = None
+        diagnostics = self.parser.getDiagnostics(self.defaultConstructions)
+        if diagnostics == self.diagnostics:
+            return
+        self.diagnostics = diagnostics
+        items = [
+            dict(
+                line=index + 1,
+                message=message
+            )
+            for index, message in diagnostics
+        ]
+        self.w.setItemValue("diagnosticsTable", items)
+
+    def cancelButtonCallback(self, sender):
+        self.w.close()
+
+    def saveButtonCallback(self, sender):
+        text = self.w.getItemValue("constructionsEditor")
+        setUserConstructions(text)
+        setExtensionDefault(defaultsKey, text)
+        self.w.close()
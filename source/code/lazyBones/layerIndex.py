@@ -0,0 +1,116 @@
+__all__ = """
+LayerObserver
+LayerGlyphIndex
+""".strip().splitlines()
+
+
+# --------
+# Observer
+# --------
+
+class LayerObserver:
+
+    """
+    A base for objects that observe a defcon layer and
+    the glyphs in it. Subclasses set `_layer` to the
+    naked layer and list `(notification, "method name")`
+    tuples in `layerNotifications` and `glyphNotifications`.
+    """
+
+    layerNotifications = []
+    glyphNotifications = []
+
+    def _startObserving(self):
+        for notification, methodName in self.layerNotifications:
+            self._layer.addObserver(self, methodName, notification)
+        # Glyph notifications are observed through the
+        # dispatcher for all glyphs at once rather than
+        # adding an observer to every glyph.
+        dispatcher = self._layer.dispatcher
+        if dispatcher is not None:
+            for notification, methodName in self.glyphNotifications:
+                dispatcher.addObserver(self, methodName, notification=notification, observable=None)
+
+    def _stopObserving(self):
+        for notification, methodName in self.layerNotifications:
+            self._layer.removeObserver(self, notification)
+        dispatcher = self._layer.dispatcher
+        if dispatcher is not None:
+            for notification, methodName in self.glyphNotifications:
+                dispatcher.removeObserver(self, notification, observable=None)
+
+
+# -----
+# Index
+# -----
+
+class LayerGlyphIndex(LayerObserver):
+
+    """
+    An index of the glyph names in a layer.
+
+    `glyphNames` contains every glyph name in the layer
+    and `nonEmptyGlyphNames` contains the names of glyphs
+    that have contours or components. The index is built
+    once and then kept current by observing the layer,
+    so lookups never need to scan the layer. Call `close`
+    when the index is no longer needed.
+    """
+
+    def __init__(self, layer):
+        self.layer = layer
+        self._layer = layer.naked()
+        self.glyphNames = set()
+        self.nonEmptyGlyphNames = set()
+        for glyph in self._layer:
+            self._updateGlyph(glyph)
+        self._startObserving()
+
+    def close(self):
+        self._stopObserving()
+
+    def _updateGlyph(self, glyph):
+        name = glyph.name
+        self.glyphNames.add(name)
+        if len(glyph) or len(glyph.components):
+            self.nonEmptyGlyphNames.add(name)
+        else:
+            self.nonEmptyGlyphNames.discard(name)
+
+    def _removeGlyphName(self, name):
+        self.glyphNames.discard(name)
+        self.nonEmptyGlyphNames.discard(name)
+
+    # -------------
+    # Notifications
+    # -------------
+
+    layerNotifications = [
+        ("Layer.GlyphAdded", "_layerGlyphAddedCallback"),
+        ("Layer.GlyphDeleted", "_layerGlyphDeletedCallback"),
+        ("Layer.GlyphNameChanged", "_layerGlyphNameChangedCallback")
+    ]
+    glyphNotifications = [
+        ("Glyph.ContoursChanged", "_glyphContentsChangedCallback"),
+        ("Glyph.ComponentsChanged", "_glyphContentsChangedCallback")
+    ]
+
+    def _layerGlyphAddedCallback(self, notification):
+        name = notification.data["name"]
+        if name in self._layer:
+            self._updateGlyph(self._layer[name])
+
+    def _layerGlyphDeletedCallback(self, notification):
+        self._removeGlyphName(notification.data["name"])
+
+    def _layerGlyphNameChangedCallback(self, notification):
+        self._removeGlyphName(notification.data["oldValue"])
+        newName = notification.data["newValue"]
+        if newName in self._layer:
+            self._updateGlyph(self._layer[newName])
+
+    def _glyphContentsChangedCallback(self, notification):
+        glyph = notification.object
+        if glyph.layer is not self._layer:
+            return
+        self._updateGlyph(glyph)
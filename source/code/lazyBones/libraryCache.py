@@ -0,0 +1,189 @@
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+import glyphConstruction
+
+__all__ = """
+libraryCacheFileName
+getLibraryCachePath
+setLibraryCachePath
+getCachedLibrary
+storeCachedLibrary
+clearLibraryCache
+getGlyphConstructionVersion
+writePickle
+""".strip().splitlines()
+
+
+# Compiled construction libraries are kept in one file
+# so that a library is only parsed again when its text,
+# the variable names or glyphConstruction change. The
+# file is read once, the first time a library is needed.
+
+libraryCacheFileName = "com.typesupply.LazyBones.compiledConstructions.pickle"
+libraryCacheFormat = 1
+libraryCacheLimit = 8
+
+# ----
+# Path
+# ----
+
+_libraryCachePath = []
+
+def _getDefaultLibraryCachePath():
+    # RoboFont keeps its support files in this
+    # folder. Elsewhere, the user cache folder
+    # is used instead.
+    folder = os.path.expanduser("~/Library/Application Support/RoboFont")
+    if not os.path.isdir(folder):
+        folder = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(folder, libraryCacheFileName)
+
+def getLibraryCachePath():
+    """
+    Get the path of the cache file.
+    This returns None if the cache is off.
+    """
+    if not _libraryCachePath:
+        _libraryCachePath.append(_getDefaultLibraryCachePath())
+    return _libraryCachePath[0]
+
+def setLibraryCachePath(path):
+    """
+    Set the path of the cache file.
+    Set path to None to turn the cache off.
+    """
+    _libraryCachePath[:] = [path]
+    _cachedLibraries.clear()
+    _loaded[:] = []
+
+# -------
+# Version
+# -------
+
+_glyphConstructionVersion = []
+
+def getGlyphConstructionVersion():
+    """
+    Get a value that changes when
+    glyphConstruction changes.
+    """
+    if not _glyphConstructionVersion:
+        version = getattr(glyphConstruction, "__version__", None)
+        if version is None:
+            # Stand alone copies of the module have no version,
+            # so the module file is used to tell them apart.
+            try:
+                stat = os.stat(glyphConstruction.__file__)
+                version = (stat.st_size, stat.st_mtime)
+            except (AttributeError, TypeError, OSError):
+                version = None
+        _glyphConstructionVersion.append(version)
+    return _glyphConstructionVersion[0]
+
+def _getCacheVersion():
+    return (libraryCacheFormat, getGlyphConstructionVersion())
+
+# -------
+# Writing
+# -------
+
+def writePickle(path, value):
+    """
+    Pickle value to path. The value is written to a
+    temporary file that then replaces the file at path,
+    so the file is never left half written. The
+    temporary file is removed if writing fails.
+    This returns False if the file couldn't be written.
+    """
+    folder = os.path.dirname(path)
+    tempPath = None
+    try:
+        os.makedirs(folder, exist_ok=True)
+        handle, tempPath = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        with os.fdopen(handle, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tempPath, path)
+        tempPath = None
+    except OSError:
+        return False
+    finally:
+        if tempPath is not None:
+            try:
+                os.remove(tempPath)
+            except OSError:
+                pass
+    return True
+
+# -----
+# Cache
+# -----
+
+_cachedLibraries = OrderedDict()
+_loaded = []
+
+def _load():
+    if _loaded:
+        return
+    _loaded.append(True)
+    path = getLibraryCachePath()
+    if path is None or not os.path.exists(path):
+        return
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+    except Exception:
+        # A damaged or outdated cache is
+        # rebuilt as libraries are compiled.
+        return
+    if not isinstance(data, dict) or data.get("version") != _getCacheVersion():
+        return
+    _cachedLibraries.update(data["libraries"])
+
+def _write():
+    path = getLibraryCachePath()
+    if path is None:
+        return
+    data = dict(
+        version=_getCacheVersion(),
+        libraries=_cachedLibraries
+    )
+    writePickle(path, data)
+
+def getCachedLibrary(key):
+    """
+    Get the compiled library stored for key or None.
+    key is a tuple of the text hash and variable names.
+    """
+    if getLibraryCachePath() is None:
+        return None
+    _load()
+    library = _cachedLibraries.get(key)
+    if library is not None:
+        _cachedLibraries.move_to_end(key)
+    return library
+
+def storeCachedLibrary(key, library):
+    """
+    Store the compiled library for key and
+    write the cache file.
+    """
+    if getLibraryCachePath() is None:
+        return
+    _load()
+    _cachedLibraries[key] = library
+    while len(_cachedLibraries) > libraryCacheLimit:
+        _cachedLibraries.popitem(last=False)
+    _write()
+
+def clearLibraryCache():
+    """
+    Remove the cache file and the
+    libraries read from it.
+    """
+    _cachedLibraries.clear()
+    _loaded[:] = []
+    path = getLibraryCachePath()
+    if path is not None and os.path.exists(path):
+        os.remove(path)
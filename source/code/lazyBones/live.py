@@ -0,0 +1,169 @@
+import time
+from lazyBones.constructions import loadConstructions, buildConstructionsInLayer
+from lazyBones.graph import ConstructionGraph
+from lazyBones.fingerprints import isGlyphScaffold, getEditedConstruction
+from lazyBones.layerIndex import LayerObserver
+
+__all__ = """
+LiveRebuild
+""".strip().splitlines()
+
+
+class LiveRebuild(LayerObserver):
+
+    """
+    Rebuild the glyphs that are built from a glyph
+    when the glyph changes.
+
+    Changes are collected until no glyph has changed for
+    delay seconds. Then the glyphs that depend on the
+    changed glyphs, directly or through other glyphs, are
+    rebuilt in dependency order. Only glyphs that were
+    built by Lazy Bones with a fingerprint and have not
+    been edited since are rebuilt, and glyphs whose
+    fingerprint hasn't changed are skipped. Glyphs built
+    from an edited construction are rebuilt from it.
+
+    schedule is a function that takes a delay and a
+    callback and calls the callback after the delay,
+    such as `callLater` from the run loop. If it is None,
+    call `flush` to rebuild. Call `close` when the live
+    rebuild is no longer needed.
+    """
+
+    def __init__(self, layer, delay=0.5, schedule=None, undo=True):
+        self.layer = layer
+        self._layer = layer.naked()
+        self.delay = delay
+        self.schedule = schedule
+        self.undo = undo
+        self.changedGlyphNames = set()
+        self._deadline = None
+        self._scheduled = False
+        self._building = False
+        self._constructions = None
+        self._graph = None
+        self._startObserving()
+
+    def close(self):
+        self._stopObserving()
+        self.changedGlyphNames.clear()
+        self.schedule = None
+
+    # -------
+    # Changes
+    # -------
+
+    def glyphChanged(self, name):
+        """
+        Record that the named glyph has changed.
+        """
+        self.changedGlyphNames.add(name)
+        self._deadline = time.perf_counter() + self.delay
+        if self.schedule is not None and not self._scheduled:
+            self._scheduled = True
+            self.schedule(self.delay, self._scheduleCallback)
+
+    def _scheduleCallback(self):
+        self._scheduled = False
+        if self._deadline is None or self.schedule is None:
+            return
+        remaining = self._deadline - time.perf_counter()
+        if remaining > 0:
+            self._scheduled = True
+            self.schedule(remaining, self._scheduleCallback)
+        else:
+            self.flush()
+
+    # --------
+    # Building
+    # --------
+
+    def getGraph(self):
+        """
+        Get the dependency graph of the constructions
+        for the layer. The graph is only made again
+        when the constructions have changed.
+        """
+        constructions = loadConstructions(self.layer)
+        if constructions != self._constructions:
+            self._constructions = constructions
+            self._graph = ConstructionGraph(constructions)
+        return self._graph
+
+    def getAffectedGlyphNames(self, glyphNames):
+        """
+        Get the names of the glyphs in the layer that
+        would be rebuilt after the given glyphs change.
+        """
+        affected = self.getGraph().getAffected(glyphNames)
+        return [
+            name
+            for name in sorted(affected)
+            if name in self._layer and isGlyphScaffold(self.layer[name])
+        ]
+
+    def flush(self):
+        """
+        Rebuild the glyphs affected by the changes
+        collected so far. This returns a list of the
+        names that were built.
+        """
+        changed = self.changedGlyphNames
+        self.changedGlyphNames = set()
+        self._deadline = None
+        if not changed:
+            return []
+        glyphNames = self.getAffectedGlyphNames(changed)
+        if not glyphNames:
+            return []
+        # Glyphs that were built from a construction edited
+        # in the font sheet or the glyph editor are rebuilt
+        # from that construction rather than the library's.
+        modifiedConstructions = {}
+        for name in glyphNames:
+            data = getEditedConstruction(self.layer[name])
+            if data is not None:
+                modifiedConstructions[name] = dict(name=name, **data)
+        # The rebuilt glyphs post notifications when the
+        # batch finishes. Their dependents are already in
+        # glyphNames, so those notifications are ignored.
+        self._building = True
+        try:
+            return buildConstructionsInLayer(
+                self.layer,
+                glyphNames,
+                modifiedConstructions=modifiedConstructions,
+                undo=self.undo,
+                skipUnchanged=True
+            )
+        finally:
+            self._building = False
+
+    # -------------
+    # Notifications
+    # -------------
+
+    layerNotifications = [
+        ("Layer.GlyphAdded", "_layerGlyphChangedCallback"),
+        ("Layer.GlyphDeleted", "_layerGlyphChangedCallback")
+    ]
+    glyphNotifications = [
+        ("Glyph.ContoursChanged", "_glyphChangedCallback"),
+        ("Glyph.ComponentsChanged", "_glyphChangedCallback"),
+        ("Glyph.AnchorsChanged", "_glyphChangedCallback"),
+        ("Glyph.WidthChanged", "_glyphChangedCallback")
+    ]
+
+    def _layerGlyphChangedCallback(self, notification):
+        if self._building:
+            return
+        self.glyphChanged(notification.data["name"])
+
+    def _glyphChangedCallback(self, notification):
+        if self._building:
+            return
+        glyph = notification.object
+        if glyph.layer is not self._layer:
+            return
+        self.glyphChanged(glyph.name)
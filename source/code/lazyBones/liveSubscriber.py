@@ -0,0 +1,87 @@
+from mojo.subscriber import Subscriber, registerRoboFontSubscriber, unregisterRoboFontSubscriber, listRegisteredSubscribers
+from mojo.extensions import setExtensionDefault
+from mojo.roboFont import AllFonts
+from PyObjCTools.AppHelper import callLater
+
+__all__ = """
+liveRebuildDefaultsKey
+isLiveRebuildOn
+startLiveRebuild
+stopLiveRebuild
+toggleLiveRebuild
+""".strip().splitlines()
+
+
+liveRebuildDefaultsKey = "com.typesupply.LazyBones.liveRebuild"
+
+# The construction engine is only imported
+# when live rebuilding is turned on.
+
+class LazyBonesLiveRebuildSubscriber(Subscriber):
+
+    """
+    Keep a live rebuild for the default
+    layer of every open font.
+    """
+
+    def build(self):
+        self.rebuilds = {}
+
+    def started(self):
+        for font in AllFonts():
+            self._addFont(font)
+
+    def destroy(self):
+        for rebuild in self.rebuilds.values():
+            rebuild.close()
+        self.rebuilds.clear()
+
+    def fontDocumentDidOpen(self, info):
+        self._addFont(info["font"])
+
+    def fontDocumentWillClose(self, info):
+        rebuild = self.rebuilds.pop(id(info["font"].naked()), None)
+        if rebuild is not None:
+            rebuild.close()
+
+    def _addFont(self, font):
+        from lazyBones.live import LiveRebuild
+        key = id(font.naked())
+        if key in self.rebuilds:
+            return
+        self.rebuilds[key] = LiveRebuild(
+            font.defaultLayer,
+            schedule=callLater
+        )
+
+
+def _getSubscribers():
+    return listRegisteredSubscribers(subscriberClassName=LazyBonesLiveRebuildSubscriber.__name__)
+
+def isLiveRebuildOn():
+    return bool(_getSubscribers())
+
+def startLiveRebuild():
+    """
+    Start rebuilding glyphs when the
+    glyphs they are built from change.
+    """
+    if not isLiveRebuildOn():
+        registerRoboFontSubscriber(LazyBonesLiveRebuildSubscriber)
+
+def stopLiveRebuild():
+    for subscriber in _getSubscribers():
+        unregisterRoboFontSubscriber(subscriber)
+
+def toggleLiveRebuild():
+    """
+    Turn live rebuilding on or off and
+    remember the setting for next launch.
+    """
+    if isLiveRebuildOn():
+        stopLiveRebuild()
+    else:
+        startLiveRebuild()
+    setExtensionDefault(liveRebuildDefaultsKey, isLiveRebuildOn())
+    state = "on" if isLiveRebuildOn() else "off"
+    print(f"Lazy Bones live rebuild is {state}.")
@@ -0,0 +1,124 @@
+from fontTools.agl import toUnicode, UV2AGL
+from lazyBones.constructions import Construction
+
+__all__ = """
+ConstructionMatcher
+""".strip().splitlines()
+
+
+class ConstructionMatcher:
+
+    """
+    Find the construction to use for a glyph name that
+    may not be in the library. constructions is a
+    dictionary of the form returned by `loadConstructions`.
+
+    Names are matched with these rules, in order:
+
+    - The name itself.
+    - The name with its suffixes removed one at a time
+      from the end, so `a.sc.ss01` matches `a.sc` and
+      then `a`. This covers any suffix family, such as
+      `.ss01` to `.ss20`, `.alt` or `.001`.
+    - Names for a single code point, such as `uni0041`
+      or `u1F600`, are matched with their AGL name and
+      the same suffixes.
+    - Ligature names such as `f_f_t.alt` are built
+      from their parts with `f & f & t ^ f, t` if
+      every part is in the library or in the glyph
+      names given to `match`.
+
+    Results are cached by name, so each name in a batch
+    costs at most one lookup per suffix. The cache is
+    cleared when it holds more than cacheLimit names.
+    """
+
+    cacheLimit = 65536
+
+    def __init__(self, constructions):
+        self.constructions = constructions
+        self._matches = {}
+
+    def match(self, name, glyphNames=None):
+        """
+        Get the construction for name or None. The name of
+        the construction is the library name it came from.
+        glyphNames is an optional container of the glyph
+        names that exist, such as a layer, for the parts
+        of ligatures.
+        """
+        match = self._matches.get(name)
+        if match is None:
+            match = self._match(name)
+            if len(self._matches) >= self.cacheLimit:
+                self._matches.clear()
+            self._matches[name] = match
+        data, parts = match
+        if parts is not None:
+            # The parts are checked on every call since
+            # the glyph names may differ between calls.
+            for part in parts:
+                if part in self.constructions:
+                    continue
+                if glyphNames is not None and part in glyphNames:
+                    continue
+                return None
+        return data
+
+    def _match(self, name):
+        # This returns the construction and, for ligatures,
+        # the parts that must exist for it to be used.
+        base, suffixes = self._splitName(name)
+        data = self._matchSuffixes(base, suffixes)
+        if data is None:
+            aglName = self._getAGLName(base)
+            if aglName is not None:
+                data = self._matchSuffixes(aglName, suffixes)
+        if data is None and "_" in base:
+            parts = self._getLigatureParts(base)
+            if parts is not None:
+                return self._makeLigature(base, parts), parts
+        return data, None
+
+    def _splitName(self, name):
+        if name.startswith("."):
+            return name, []
+        parts = name.split(".")
+        return parts[0], parts[1:]
+
+    def _matchSuffixes(self, base, suffixes):
+        constructions = self.constructions
+        for count in range(len(suffixes), -1, -1):
+            candidate = ".".join([base] + suffixes[:count])
+            data = constructions.get(candidate)
+            if data is not None:
+                return data
+        return None
+
+    def _getAGLName(self, base):
+        # toUnicode also reads ligature names, which
+        # are matched from their parts instead.
+        if not base.startswith("u") or "_" in base:
+            return None
+        text = toUnicode(base)
+        if len(text) != 1:
+            return None
+        aglName = UV2AGL.get(ord(text))
+        if aglName == base:
+            return None
+        return aglName
+
+    def _getLigatureParts(self, base):
+        parts = []
+        for part in base.split("_"):
+            if not part:
+                return None
+            aglName = self._getAGLName(part)
+            if aglName is not None:
+                part = aglName
+            parts.append(part)
+        return tuple(parts)
+
+    def _makeLigature(self, base, parts):
+        construction = " & ".join(parts) + f" ^ {parts[0]}, {parts[-1]}"
+        return Construction(base, construction, decompose=True)
@@ -0,0 +1,230 @@
+import os
+import re
+import pickle
+import hashlib
+from collections import OrderedDict
+from fontTools.pens.recordingPen import RecordingPointPen
+from lazyBones.graph import getConstructionReferences
+from lazyBones.expressions import getFontMetrics, fontMetricNames
+from lazyBones.fingerprints import hashGlyphDeep
+from lazyBones.libraryCache import getGlyphConstructionVersion, writePickle
+
+__all__ = """
+CachedOutline
+getOutlineKey
+getCachedOutline
+storeCachedOutline
+getOutlineCacheFolder
+setOutlineCacheFolder
+clearOutlineCache
+""".strip().splitlines()
+
+
+# Built outlines are cached by a hash of everything that
+# building them depends on, so the same construction from
+# the same source glyphs is only built once, no matter
+# which font, layer or session it is built in. The cache
+# is kept in memory and, if a folder is set, on disk.
+# Both keep the most recently used outlines up to
+# their limit.
+
+outlineCacheLimit = 4096
+outlineCacheDiskLimit = 65536
+
+# -------
+# Outline
+# -------
+
+class CachedOutline:
+
+    """
+    The result of a construction: the point pen
+    calls that draw it and its attributes.
+    """
+
+    __slots__ = ("unicode", "note", "width", "points")
+
+    def __init__(self, unicode, note, width, points):
+        self.unicode = unicode
+        self.note = note
+        self.width = width
+        self.points = points
+
+    @classmethod
+    def fromBuilt(cls, built):
+        """
+        Record a built construction.
+        """
+        pen = RecordingPointPen()
+        built.drawPoints(pen)
+        return cls(built.unicode, built.note, built.width, tuple(pen.value))
+
+    def drawPoints(self, pointPen):
+        for methodName, args, kwargs in self.points:
+            getattr(pointPen, methodName)(*args, **kwargs)
+
+    def __reduce__(self):
+        return (CachedOutline, (self.unicode, self.note, self.width, self.points))
+
+# ---
+# Key
+# ---
+
+nameRE = re.compile(r"[A-Za-z_]\w*")
+
+def _getReferencedMetricNames(construction):
+    names = set(nameRE.findall(construction))
+    if "@" in construction:
+        # Anchor positions are slanted
+        # with the italic angle.
+        names.add("italicAngle")
+    return [name for name in fontMetricNames if name in names]
+
+def getOutlineKey(layer, name, construction, glyphHashes=None):
+    """
+    Get the cache key for building construction in layer.
+    construction is the full construction, including
+    `null =`. glyphHashes is an optional dictionary of
+    glyph hashes, as for `getConstructionFingerprint`.
+    This returns None if the construction references
+    the glyph it builds, since the result depends on
+    the glyph itself, or if the cache is off.
+    """
+    if outlineCacheLimit <= 0 and _outlineCacheFolder[0] is None:
+        return None
+    references = getConstructionReferences(construction.split("=", 1)[1])
+    if name in references:
+        return None
+    if glyphHashes is None:
+        glyphHashes = {}
+    hasher = hashlib.sha1()
+    hasher.update(repr((getGlyphConstructionVersion(), construction)).encode("utf-8"))
+    # The variables and the expressions have been filled
+    # in, so only the font metrics that the builder reads
+    # from the font can change the result.
+    metricNames = _getReferencedMetricNames(construction)
+    if metricNames:
+        fontMetrics = getFontMetrics(layer)
+        metrics = [(metricName, fontMetrics.get(metricName)) for metricName in metricNames]
+        hasher.update(repr(metrics).encode("utf-8"))
+    for reference in sorted(references):
+        glyphHash = hashGlyphDeep(layer, reference, glyphHashes)
+        hasher.update(f"{reference}:{glyphHash}".encode("utf-8"))
+    return hasher.hexdigest()
+
+# -----
+# Cache
+# -----
+
+_cachedOutlines = OrderedDict()
+_outlineCacheFolder = [None]
+_diskOutlineCount = [None]
+
+def getOutlineCacheFolder():
+    """
+    Get the folder of the disk cache or None.
+    """
+    return _outlineCacheFolder[0]
+
+def setOutlineCacheFolder(path):
+    """
+    Set the folder of the disk cache. Set
+    path to None to turn the disk cache off.
+    """
+    _outlineCacheFolder[0] = path
+    _diskOutlineCount[0] = None
+
+def _getOutlinePath(key):
+    return os.path.join(_outlineCacheFolder[0], key + ".pickle")
+
+def getCachedOutline(key):
+    """
+    Get the CachedOutline for key or None.
+    """
+    outline = _cachedOutlines.get(key)
+    if outline is not None:
+        _cachedOutlines.move_to_end(key)
+        return outline
+    if _outlineCacheFolder[0] is None:
+        return None
+    path = _getOutlinePath(key)
+    try:
+        with open(path, "rb") as f:
+            outline = pickle.load(f)
+        # The modification time marks when the
+        # outline was last used for pruning.
+        os.utime(path)
+    except Exception:
+        return None
+    _storeInMemory(key, outline)
+    return outline
+
+def storeCachedOutline(key, outline):
+    """
+    Store the CachedOutline for key.
+    """
+    _storeInMemory(key, outline)
+    if _outlineCacheFolder[0] is None:
+        return
+    if writePickle(_getOutlinePath(key), outline):
+        _countDiskOutline()
+
+def _countDiskOutline():
+    if _diskOutlineCount[0] is None:
+        _diskOutlineCount[0] = len(_listDiskOutlines())
+    else:
+        _diskOutlineCount[0] += 1
+    if _diskOutlineCount[0] > outlineCacheDiskLimit:
+        _pruneDiskOutlines()
+
+def _listDiskOutlines():
+    folder = _outlineCacheFolder[0]
+    try:
+        fileNames = os.listdir(folder)
+    except OSError:
+        return []
+    return [
+        os.path.join(folder, fileName)
+        for fileName in fileNames
+        if fileName.endswith(".pickle")
+    ]
+
+def _pruneDiskOutlines():
+    # The least recently used outlines are removed until
+    # a quarter of the limit is free, so that the folder
+    # isn't listed again on the next store.
+    paths = []
+    for path in _listDiskOutlines():
+        try:
+            paths.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+    paths.sort()
+    count = len(paths)
+    keep = outlineCacheDiskLimit * 3 // 4
+    for modified, path in paths[:max(0, count - keep)]:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        count -= 1
+    _diskOutlineCount[0] = count
+
+def _storeInMemory(key, outline):
+    if outlineCacheLimit <= 0:
+        return
+    _cachedOutlines[key] = outline
+    while len(_cachedOutlines) > outlineCacheLimit:
+        _cachedOutlines.popitem(last=False)
+
+def clearOutlineCache(disk=False):
+    """
+    Remove the outlines from memory and,
+    if disk is True, from the disk cache.
+    """
+    _cachedOutlines.clear()
+    if not disk or _outlineCacheFolder[0] is None:
+        return
+    for path in _listDiskOutlines():
+        os.remove(path)
+    _diskOutlineCount[0] = 0
@@ -0,0 +1,287 @@
+import os
+import sys
+import queue
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+__all__ = """
+ParallelBuild
+buildFontsInParallel
+getWorkerExecutable
+""".strip().splitlines()
+
+
+# -------
+# Workers
+# -------
+
+def _buildFontAtPath(path, glyphNames, modifiedConstructions, skipUnchanged, allLayers, userConstructions, progressQueue):
+    # This runs in a worker process, so only the
+    # construction engine and fontParts are imported.
+    from fontParts.world import OpenFont
+    from lazyBones.constructions import buildConstructionsInLayers, setUserConstructions
+
+    setUserConstructions(userConstructions)
+
+    def progressCallback(name):
+        progressQueue.put((path, name))
+
+    font = OpenFont(path, showInterface=False)
+    if allLayers:
+        layers = font.layers
+    else:
+        layers = [font.defaultLayer]
+    built = buildConstructionsInLayers(
+        layers,
+        glyphNames,
+        modifiedConstructions=modifiedConstructions,
+        progressCallback=progressCallback,
+        undo=False,
+        skipUnchanged=skipUnchanged
+    )
+    glyphs = [
+        (layer.name, name, layer[name].dumpToGLIF())
+        for layer, names in zip(layers, built)
+        for name in names
+    ]
+    font.close()
+    return glyphs
+
+
+def getWorkerExecutable():
+    """
+    Get the Python interpreter that runs the workers.
+    When Python is embedded in an application, such as
+    RoboFont, sys.executable is the application, so
+    the interpreter in sys.exec_prefix is used. This
+    returns None if there is no interpreter, since
+    spawning the application would start copies of it.
+    """
+    executable = sys.executable
+    if executable and os.path.basename(executable).lower().startswith("python"):
+        return executable
+    for fileName in ("python3", "python"):
+        path = os.path.join(sys.exec_prefix, "bin", fileName)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+# ------
+# Driver
+# ------
+
+class ParallelBuild:
+
+    """
+    Build the constructions for the given glyph names
+    in the UFOs at paths with one worker process per font.
+    The UFOs are not modified. Instead, `poll` returns the
+    results as the workers finish. This never blocks
+    unless a timeout is given to `poll`, so it can be
+    driven from the run loop.
+
+    If the workers can't be started, for example when
+    there is no Python interpreter to run them, or a
+    worker fails, the path is added to `failedPaths`
+    instead so that the font can be built in this process.
+
+    See `buildFontsInParallel` for the arguments and
+    the form of the results.
+    """
+
+    def __init__(self,
+            paths,
+            glyphNames,
+            modifiedConstructions=None,
+            progressCallback=None,
+            maxWorkers=None,
+            skipUnchanged=False,
+            allLayers=False
+        ):
+        self.paths = list(paths)
+        self.glyphNames = list(glyphNames)
+        self.modifiedConstructions = modifiedConstructions
+        self.progressCallback = progressCallback
+        self.maxWorkers = maxWorkers
+        self.skipUnchanged = skipUnchanged
+        self.allLayers = allLayers
+        self._manager = None
+        self._executor = None
+        self._progressQueue = None
+        self._futures = {}
+        self._pending = set()
+        self.failedPaths = []
+
+    @property
+    def done(self):
+        return not self._pending
+
+    def start(self):
+        if not self.paths:
+            return
+        maxWorkers = self.maxWorkers
+        if maxWorkers is None:
+            maxWorkers = min(len(self.paths), os.cpu_count() or 1)
+        # The workers can't read the extension defaults,
+        # so they are given the user constructions.
+        from lazyBones.constructions import getUserConstructions
+        userConstructions = getUserConstructions()
+        executable = getWorkerExecutable()
+        if executable is None:
+            self.failedPaths = list(self.paths)
+            return
+        try:
+            context = multiprocessing.get_context("spawn")
+            context.set_executable(executable)
+            self._manager = context.Manager()
+            self._progressQueue = self._manager.Queue()
+            self._executor = ProcessPoolExecutor(max_workers=maxWorkers, mp_context=context)
+            self._futures = {
+                self._executor.submit(
+                    _buildFontAtPath,
+                    path,
+                    self.glyphNames,
+                    self.modifiedConstructions,
+                    self.skipUnchanged,
+                    self.allLayers,
+                    userConstructions,
+                    self._progressQueue
+                ) : path
+                for path in self.paths
+            }
+        except Exception:
+            # The fonts are built in this process
+            # if the workers can't be started.
+            self.close()
+            self.failedPaths = list(self.paths)
+            return
+        self._pending = set(self._futures)
+
+    def poll(self, timeout=0):
+        """
+        Get the results of the fonts that have finished
+        since the last poll, waiting up to timeout seconds
+        for at least one to finish.
+        """
+        if not self._pending:
+            return []
+        done, self._pending = wait(self._pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        self._drainProgressQueue()
+        results = []
+        for future in done:
+            path = self._futures[future]
+            try:
+                results.append((path, future.result()))
+            except Exception:
+                # A worker that dies breaks the pool and
+                # fails every font that hasn't finished.
+                self.failedPaths.append(path)
+        return results
+
+    def buildFailedPath(self, path):
+        """
+        Build the font at path in this process the way
+        a worker would and return the glyphs.
+        """
+        from lazyBones.constructions import getUserConstructions
+        progressQueue = queue.Queue()
+        glyphs = _buildFontAtPath(
+            path,
+            self.glyphNames,
+            self.modifiedConstructions,
+            self.skipUnchanged,
+            self.allLayers,
+            getUserConstructions(),
+            progressQueue
+        )
+        self._drainProgressQueue(progressQueue)
+        return glyphs
+
+    def close(self):
+        """
+        Shut down the workers. Fonts that haven't
+        finished are abandoned.
+        """
+        cancel = bool(self._pending)
+        if self._executor is not None:
+            self._executor.shutdown(wait=not cancel, cancel_futures=cancel)
+        if self._manager is not None:
+            if not cancel:
+                self._drainProgressQueue()
+            self._manager.shutdown()
+        self._executor = None
+        self._manager = None
+        self._pending = set()
+
+    def _drainProgressQueue(self, progressQueue=None):
+        if progressQueue is None:
+            progressQueue = self._progressQueue
+        while True:
+            try:
+                path, name = progressQueue.get_nowait()
+            except queue.Empty:
+                break
+            except (OSError, EOFError):
+                # The manager process is gone, so
+                # there is no more progress to report.
+                break
+            if self.progressCallback is not None:
+                self.progressCallback(path, name)
+
+def buildFontsInParallel(
+        paths,
+        glyphNames,
+        modifiedConstructions=None,
+        progressCallback=None,
+        maxWorkers=None,
+        skipUnchanged=False,
+        allLayers=False
+    ):
+    """
+    Build the constructions for the given glyph names
+    in the UFOs at paths with one worker process per font.
+    The UFOs are not modified. Instead, this is a generator
+    that yields a tuple of form:
+
+    ```
+    (
+        "path",
+        [
+            ("layer name", "glyph name", "GLIF data"),
+        ]
+    )
+    ```
+
+    for each font as soon as its worker finishes. The
+    glyphs are listed in the order they were built.
+    If skipUnchanged is True, glyphs whose fingerprint
+    hasn't changed are not built and not listed. If
+    allLayers is True, every layer is built in one pass.
+    Otherwise only the default layer is built.
+
+    progressCallback, if given, is called in this
+    process with the path and the glyph name each
+    time a worker starts building a glyph.
+
+    Fonts whose worker fails are built in this
+    process after the others.
+    """
+    build = ParallelBuild(
+        paths,
+        glyphNames,
+        modifiedConstructions=modifiedConstructions,
+        progressCallback=progressCallback,
+        maxWorkers=maxWorkers,
+        skipUnchanged=skipUnchanged,
+        allLayers=allLayers
+    )
+    build.start()
+    try:
+        while not build.done:
+            for result in build.poll(timeout=0.05):
+                yield result
+        for path in build.failedPaths:
+            yield path, build.buildFailedPath(path)
+    finally:
+        build.close()
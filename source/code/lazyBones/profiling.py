@@ -0,0 +1,260 @@
+"""
+Opt-in timing for builds.
+
+    from lazyBones.profiling import BuildProfiler
+
+    with BuildProfiler(useCProfile=True) as profiler:
+        buildConstructionsInLayer(font.defaultLayer, glyphNames)
+    print(profiler.formatReport())
+    profiler.writeReport("build.json")
+    profiler.dumpStats("build.pstats")
+
+When no profiler is active the build functions get
+a profiler that does nothing, so the cost of the
+instrumentation is a few attribute lookups.
+"""
+
+import json
+import time
+import cProfile
+from contextlib import contextmanager, nullcontext
+from lazyBones.fontNames import getFontName
+
+__all__ = """
+BuildProfiler
+getProfiler
+""".strip().splitlines()
+
+
+_nullContext = nullcontext()
+
+class NullProfiler:
+
+    """
+    The profiler used when profiling is not active.
+    """
+
+    active = False
+
+    def font(self, font):
+        return _nullContext
+
+    def glyph(self, glyph):
+        return _nullContext
+
+    def phase(self, name):
+        return _nullContext
+
+    def count(self, name, value=1):
+        pass
+
+nullProfiler = NullProfiler()
+
+_activeProfilers = []
+
+def getProfiler():
+    """
+    Get the active profiler.
+    """
+    if _activeProfilers:
+        return _activeProfilers[-1]
+    return nullProfiler
+
+
+class BuildProfiler:
+
+    """
+    Record the time spent in each phase of the build
+    for every glyph and font, and counters such as the
+    number of contours drawn. Use it as a context. Set
+    useCProfile to True to also record a cProfile
+    profile that can be written with `dumpStats`.
+    """
+
+    active = True
+
+    def __init__(self, useCProfile=False):
+        self.fonts = {}
+        self._fontRecord = None
+        self._glyphRecord = None
+        self._cProfile = None
+        if useCProfile:
+            self._cProfile = cProfile.Profile()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """
+        Make this the active profiler. This is the same as
+        entering the context, for builds that run over
+        several calls from the run loop.
+        """
+        _activeProfilers.append(self)
+        if self._cProfile is not None:
+            self._cProfile.enable()
+
+    def stop(self):
+        """
+        Stop profiling.
+        """
+        if self._cProfile is not None:
+            self._cProfile.disable()
+        _activeProfilers.remove(self)
+
+    # ---------
+    # Recording
+    # ---------
+
+    def _getFontRecord(self, font):
+        key = id(font.naked())
+        record = self.fonts.get(key)
+        if record is None:
+            record = dict(
+                name=getFontName(font, len(self.fonts) + 1),
+                time=0,
+                phases={},
+                counters={},
+                glyphs={}
+            )
+            self.fonts[key] = record
+        return record
+
+    @contextmanager
+    def font(self, font):
+        """
+        Attribute the time within the
+        context to the given font.
+        """
+        previous = self._fontRecord
+        record = self._fontRecord = self._getFontRecord(font)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record["time"] += time.perf_counter() - start
+            self._fontRecord = previous
+
+    @contextmanager
+    def glyph(self, glyph):
+        """
+        Attribute the time within the
+        context to the given glyph.
+        """
+        previousFont = self._fontRecord
+        previousGlyph = self._glyphRecord
+        fontRecord = self._fontRecord = self._getFontRecord(glyph.font)
+        record = fontRecord["glyphs"].get(glyph.name)
+        if record is None:
+            record = fontRecord["glyphs"][glyph.name] = dict(
+                time=0,
+                builds=0,
+                phases={},
+                counters={}
+            )
+        self._glyphRecord = record
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            record["time"] += elapsed
+            record["builds"] += 1
+            if previousFont is not fontRecord:
+                fontRecord["time"] += elapsed
+            self._fontRecord = previousFont
+            self._glyphRecord = previousGlyph
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Record the time within the context as the named
+        phase of the current glyph and font.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            for record in (self._fontRecord, self._glyphRecord):
+                if record is not None:
+                    record["phases"][name] = record["phases"].get(name, 0) + elapsed
+
+    def count(self, name, value=1):
+        """
+        Add value to the named counter of
+        the current glyph and font.
+        """
+        for record in (self._fontRecord, self._glyphRecord):
+            if record is not None:
+                record["counters"][name] = record["counters"].get(name, 0) + value
+
+    # -------
+    # Reports
+    # -------
+
+    def getReport(self):
+        """
+        Get the recorded data as a list of font
+        dictionaries. The glyphs in each font are
+        sorted from slowest to fastest.
+        """
+        report = []
+        for record in self.fonts.values():
+            glyphs = [
+                dict(name=name, **glyphRecord)
+                for name, glyphRecord in record["glyphs"].items()
+            ]
+            glyphs.sort(key=lambda glyph: -glyph["time"])
+            report.append(
+                dict(
+                    name=record["name"],
+                    time=record["time"],
+                    phases=dict(record["phases"]),
+                    counters=dict(record["counters"]),
+                    glyphs=glyphs
+                )
+            )
+        return report
+
+    def formatReport(self, slowestCount=10):
+        """
+        Format the report as text with the phase totals,
+        the counters and the slowest glyphs for each font.
+        """
+        lines = []
+        for font in self.getReport():
+            lines.append(f"{font['name']}: {len(font['glyphs'])} glyphs in {font['time'] * 1000:.1f} ms")
+            for name, value in sorted(font["phases"].items(), key=lambda item: -item[1]):
+                lines.append(f"    {name:<30} {value * 1000:10.1f} ms")
+            for name, value in sorted(font["counters"].items()):
+                lines.append(f"    {name:<30} {value:10}")
+            if font["glyphs"]:
+                lines.append("    slowest glyphs:")
+                for glyph in font["glyphs"][:slowestCount]:
+                    phases = ", ".join(
+                        f"{name} {value * 1000:.1f}"
+                        for name, value in sorted(glyph["phases"].items(), key=lambda item: -item[1])
+                    )
+                    lines.append(f"        {glyph['name']:<26} {glyph['time'] * 1000:10.1f} ms  ({phases})")
+        return "\n".join(lines)
+
+    def writeReport(self, path):
+        """
+        Write the report to path as JSON.
+        """
+        with open(path, "w") as f:
+            json.dump(self.getReport(), f, indent=2)
+
+    def dumpStats(self, path):
+        """
+        Write the cProfile profile to path. It can be
+        read with the pstats module.
+        """
+        if self._cProfile is None:
+            raise ValueError("The profiler was created without useCProfile.")
+        self._cProfile.dump_stats(path)
@@ -0,0 +1,76 @@
+import time
+
+__all__ = """
+BuildScheduler
+""".strip().splitlines()
+
+
+class BuildScheduler:
+
+    """
+    Run build jobs in short time slices so that the
+    caller can return to the run loop between slices.
+
+    jobs is a list of generators, such as the ones made
+    by `iterBuildConstructionsInLayer`. Each step of a
+    job must be short. The jobs are run in order.
+
+        scheduler = BuildScheduler(jobs)
+        while not scheduler.runSlice():
+            # let the application handle events
+            ...
+
+    `cancel` closes the jobs that haven't finished,
+    so that each job can clean up its partial work.
+    """
+
+    def __init__(self, jobs, sliceDuration=0.05):
+        self.jobs = list(jobs)
+        self.sliceDuration = sliceDuration
+        self.steps = 0
+        self.cancelled = False
+
+    @property
+    def done(self):
+        return not self.jobs
+
+    def runSlice(self):
+        """
+        Run steps until the slice duration has passed or
+        all jobs have finished. This returns True when all
+        jobs have finished. If a job raises an error, the
+        remaining jobs are cancelled and the error is raised.
+        """
+        deadline = time.perf_counter() + self.sliceDuration
+        while self.jobs:
+            job = self.jobs[0]
+            try:
+                next(job)
+            except StopIteration:
+                self.jobs.pop(0)
+                continue
+            except Exception:
+                self.jobs.pop(0)
+                self.cancel()
+                raise
+            self.steps += 1
+            if time.perf_counter() >= deadline:
+                break
+        return self.done
+
+    def runUntilDone(self):
+        """
+        Run all jobs without returning between slices.
+        """
+        while not self.runSlice():
+            pass
+
+    def cancel(self):
+        """
+        Stop all jobs that haven't finished.
+        """
+        jobs = self.jobs
+        self.jobs = []
+        for job in jobs:
+            job.close()
+        self.cancelled = True
@@ -0,0 +1,136 @@
+from lazyBones.graph import ConstructionGraph, getConstructionReferences
+from lazyBones.constructions import Construction, ConstructionsLoader
+from lazyBones.fontNames import getFontName
+
+__all__ = """
+findMissingSources
+findCycles
+validateLayers
+formatMissingSources
+""".strip().splitlines()
+
+
+def findMissingSources(constructions, existingGlyphNames, builtConstructions=None):
+    """
+    Find the glyphs referenced by the constructions that
+    will not exist when the constructions are built.
+    constructions is a dictionary of the constructions
+    that will be built and existingGlyphNames is a set of
+    the names in the layer. Glyphs built by the constructions
+    in builtConstructions count as existing, except for a
+    glyph that is built from itself and the glyphs in a
+    dependency cycle, such as `n` and `o`, that has none
+    of its glyphs in the layer. builtConstructions
+    defaults to constructions. This returns a dictionary
+    of form:
+
+    ```
+    {
+        "glyph name" : ["missing glyph name"]
+    }
+    ```
+
+    for the constructions that have missing sources.
+    """
+    if builtConstructions is None:
+        builtConstructions = constructions
+    # Glyphs in a cycle are built from each other,
+    # so at least one of them must already exist.
+    unbuildable = set()
+    for cycle in findCycles(builtConstructions):
+        if not any(name in existingGlyphNames for name in cycle):
+            unbuildable.update(cycle)
+    missing = {}
+    for name, data in constructions.items():
+        for reference in getConstructionReferences(data["construction"]):
+            if reference in existingGlyphNames:
+                continue
+            if reference != name and reference in builtConstructions and reference not in unbuildable:
+                continue
+            missing.setdefault(name, []).append(reference)
+    return missing
+
+def findCycles(constructions):
+    """
+    Find the glyphs in constructions that depend on each
+    other, such as `period` and `comma`. They can't be
+    built in an order where each is built from the others'
+    new outlines. This returns a list of sorted glyph
+    name lists.
+    """
+    graph = ConstructionGraph(constructions)
+    order, cycles = graph.getBuildOrder(constructions.keys())
+    return cycles
+
+def validateLayers(layers, glyphNames, modifiedConstructions=None, guessMissing=False):
+    """
+    Check the glyph references of the constructions for
+    the given glyph names in each of the layers before
+    anything is built. If guessMissing is True, names
+    that aren't in the library are guessed as they are
+    when building. This returns a list of tuples
+    of form:
+
+    ```
+    (layer, {missing sources}, [cycles])
+    ```
+
+    for the layers that have missing sources or glyphs
+    that depend on each other. See `findMissingSources`
+    and `findCycles` for the forms of the missing
+    sources and the cycles.
+    """
+    if modifiedConstructions is None:
+        modifiedConstructions = {}
+    glyphNames = set(glyphNames)
+    problems = []
+    for layer in layers:
+        loader = ConstructionsLoader(layer)
+        constructions = {
+            name : data
+            for name, data in loader.constructions.items()
+            if name in glyphNames
+        }
+        for name, data in modifiedConstructions.items():
+            constructions[name] = Construction.fromData(data)
+        if guessMissing:
+            for name in glyphNames:
+                if name in constructions:
+                    continue
+                data = loader.guessConstructionForGlyphName(name)
+                if data is not None:
+                    constructions[name] = data.replace(name=name)
+        missing = findMissingSources(constructions, set(layer.keys()))
+        cycles = findCycles(constructions)
+        if missing or cycles:
+            problems.append((layer, missing, cycles))
+    return problems
+
+def formatMissingSources(problems, maximumCount=20):
+    """
+    Format the result of `validateLayers` as text with
+    a line for the missing sources and a line for each
+    cycle of each font and layer.
+    """
+    lines = []
+    untitledNumbers = {}
+    for layer, missing, cycles in problems:
+        font = layer.font
+        key = id(font.naked())
+        if key not in untitledNumbers:
+            untitledNumbers[key] = len(untitledNumbers) + 1
+        fontName = getFontName(font, untitledNumbers[key])
+        if layer.name != font.defaultLayerName:
+            fontName += f" ({layer.name})"
+        if missing:
+            sources = sorted(set(
+                reference
+                for references in missing.values()
+                for reference in references
+            ))
+            if len(sources) > maximumCount:
+                sources = sources[:maximumCount] + ["..."]
+            lines.append(f"{fontName}: missing {' '.join(sources)}")
+        for cycle in cycles:
+            lines.append(f"{fontName}: {', '.join(cycle)} depend on each other")
+    return "\n".join(lines)
@@ -0,0 +1,179 @@
+import weakref
+
+__all__ = """
+getVariableValues
+getVariables
+getVariableNames
+registerVariableFunction
+clearVariablesCache
+""".strip().splitlines()
+
+
+# ------------------
+# Variable Functions
+# ------------------
+
+def calculateOvershoots(layer):
+    """
+    Calculate the overshoots as the bottom
+    of the bounds of the "O" and the "o".
+    """
+    variables = {}
+    for glyphName, variableName in (("O", "overshootUpper"), ("o", "overshootLower")):
+        if glyphName in layer:
+            bounds = layer[glyphName].bounds
+            if bounds is not None:
+                variables[variableName] = bounds[1]
+    return variables
+
+variableFunctions = []
+
+def registerVariableFunction(function, glyphNames, defaults):
+    """
+    Register a function that calculates variables.
+
+    function is called with a defcon layer and must
+    return a dictionary of variable values. It should
+    calculate all of its variables in one pass. Values
+    that it doesn't return fall back to the defaults.
+
+    glyphNames lists the glyphs that the variables are
+    calculated from. The values for a layer are cached
+    until one of these glyphs changes.
+
+    defaults is a dictionary of the variable names
+    and their values when they can't be calculated.
+    """
+    variableFunctions.append(
+        dict(
+            function=function,
+            glyphNames=frozenset(glyphNames),
+            defaults=dict(defaults)
+        )
+    )
+    clearVariablesCache()
+
+def getVariableNames():
+    """
+    Get the names of all registered variables.
+    """
+    names = []
+    for data in variableFunctions:
+        names.extend(data["defaults"].keys())
+    return names
+
+
+# -----
+# Cache
+# -----
+
+class LayerVariables:
+
+    """
+    The variable values for a layer. Values are calculated
+    the first time they are needed and are kept until
+    one of the glyphs they are calculated from changes.
+    """
+
+    def __init__(self, layer):
+        self._layer = weakref.ref(layer)
+        self._values = {}
+        self._glyphNameToFunctionIndexes = {}
+        for index, data in enumerate(variableFunctions):
+            for glyphName in data["glyphNames"]:
+                self._glyphNameToFunctionIndexes.setdefault(glyphName, set()).add(index)
+        layer.addObserver(self, "_layerGlyphsChangedCallback", "Layer.GlyphAdded")
+        layer.addObserver(self, "_layerGlyphsChangedCallback", "Layer.GlyphDeleted")
+        layer.addObserver(self, "_layerGlyphNameChangedCallback", "Layer.GlyphNameChanged")
+        dispatcher = layer.dispatcher
+        if dispatcher is not None:
+            dispatcher.addObserver(self, "_glyphChangedCallback", notification="Glyph.Changed", observable=None)
+
+    def close(self):
+        layer = self._layer()
+        if layer is None:
+            return
+        layer.removeObserver(self, "Layer.GlyphAdded")
+        layer.removeObserver(self, "Layer.GlyphDeleted")
+        layer.removeObserver(self, "Layer.GlyphNameChanged")
+        dispatcher = layer.dispatcher
+        if dispatcher is not None:
+            dispatcher.removeObserver(self, "Glyph.Changed", observable=None)
+
+    def getValues(self):
+        layer = self._layer()
+        variables = {}
+        for index, data in enumerate(variableFunctions):
+            values = self._values.get(index)
+            if values is None:
+                values = dict(data["defaults"])
+                values.update(data["function"](layer))
+                self._values[index] = values
+            variables.update(values)
+        return variables
+
+    def invalidateGlyphName(self, glyphName):
+        for index in self._glyphNameToFunctionIndexes.get(glyphName, ()):
+            self._values.pop(index, None)
+
+    def _layerGlyphsChangedCallback(self, notification):
+        self.invalidateGlyphName(notification.data["name"])
+
+    def _layerGlyphNameChangedCallback(self, notification):
+        self.invalidateGlyphName(notification.data["oldValue"])
+        self.invalidateGlyphName(notification.data["newValue"])
+
+    def _glyphChangedCallback(self, notification):
+        glyph = notification.object
+        if glyph.name not in self._glyphNameToFunctionIndexes:
+            return
+        if glyph.layer is not self._layer():
+            return
+        self.invalidateGlyphName(glyph.name)
+
+_layerVariables = weakref.WeakKeyDictionary()
+
+def getVariableValues(layer):
+    """
+    Get the variable values for the given layer.
+    """
+    layer = layer.naked()
+    layerVariables = _layerVariables.get(layer)
+    if layerVariables is None:
+        layerVariables = LayerVariables(layer)
+        _layerVariables[layer] = layerVariables
+    return layerVariables.getValues()
+
+def getVariables(layer):
+    """
+    Get the variable definitions for the given
+    layer in glyph construction syntax.
+    """
+    variables = getVariableValues(layer)
+    lines = [
+        f"${name} = {value}"
+        for name, value in variables.items()
+    ]
+    return "\n" + "\n".join(lines) + "\n"
+
+def clearVariablesCache():
+    """
+    Remove all cached variable values.
+    """
+    for layerVariables in list(_layerVariables.values()):
+        layerVariables.close()
+    _layerVariables.clear()
+
+
+# --------
+# Built In
+# --------
+
+registerVariableFunction(
+    calculateOvershoots,
+    glyphNames=("O", "o"),
+    defaults=dict(
+        overshootUpper=0,
+        overshootLower=0
+    )
+)
@@ -0,0 +1,3 @@
+from lazyBones.liveSubscriber import toggleLiveRebuild
+
+toggleLiveRebuild()
\ No newline at end of file